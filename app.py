@@ -1,21 +1,41 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file, g, has_app_context
 from datetime import datetime
 import sqlite3
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.utils import ImageReader
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase import pdfmetrics, pdfdoc
+from reportlab.pdfbase.ttfonts import TTFont, TTFontFace, TTFNameBytes, TTEncoding
+from reportlab import Version as REPORTLAB_VERSION
 from reportlab.lib.units import inch
+from reportlab import rl_config
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import NameObject
+from PIL import Image, ImageChops, ImageStat
 import io
+import sys
+from array import array
 import shutil
 import base64
 import requests
 import json
 import re
+import bisect
 import hashlib
+import threading
+import multiprocessing
+from weakref import WeakKeyDictionary
+import time
+import queue
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote
+from werkzeug.security import safe_join
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 
 app = Flask(__name__)
 app.config['TEMPLATES_AUTO_RELOAD'] = True  # Add this line
@@ -30,6 +50,171 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['GENERATED_FOLDER'], exist_ok=True)
 os.makedirs(app.config['STATIC_FOLDER'], exist_ok=True)
 
+# SQLite connections - requests borrow tuned connections from a small per-process pool,
+# background threads keep one long-lived connection per database
+DATABASES = {
+    'consents': 'consents.db',
+    'users': 'users.db',
+    'consent_system': 'consent_system.db',
+    'translations': 'translations.db'
+}
+# consent_system.db is shared with other tools and keeps its rollback journal
+app.config['SQLITE_WAL_DATABASES'] = ['consents', 'users', 'translations']
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+app.config['SQLITE_CACHE_SIZE_KB'] = 16384
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 0))  # 0 disables mmap
+app.config['SQLITE_POOL_SIZE'] = 8  # idle connections kept per database
+
+_db_local = threading.local()
+_db_pool = {'pid': None, 'idle': {}}
+_db_pool_lock = threading.Lock()
+
+def open_db(path, wal=True, **kwargs):
+    """Open a SQLite connection with tuned pragmas, in WAL mode unless wal=False"""
+    conn = sqlite3.connect(path, timeout=app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000, **kwargs)
+    if wal:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f"PRAGMA cache_size=-{app.config['SQLITE_CACHE_SIZE_KB']}")
+    conn.execute(f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}")
+    if app.config['SQLITE_MMAP_SIZE']:
+        conn.execute(f"PRAGMA mmap_size={app.config['SQLITE_MMAP_SIZE']}")
+    return conn
+
+def open_named_db(name, **kwargs):
+    """Open a connection to one of DATABASES with its journal settings"""
+    return open_db(DATABASES[name], wal=name in app.config['SQLITE_WAL_DATABASES'], **kwargs)
+
+def _checkout_db(name):
+    """Take an idle pooled connection, or open a new one"""
+    with _db_pool_lock:
+        # Connections never cross a fork into render pool workers
+        if _db_pool['pid'] != os.getpid():
+            _db_pool['pid'] = os.getpid()
+            _db_pool['idle'] = {}
+        idle = _db_pool['idle'].setdefault(name, [])
+        if idle:
+            return idle.pop()
+    # Pooled connections move between request threads, one request at a time
+    return open_named_db(name, check_same_thread=False)
+
+def _checkin_db(name, conn):
+    """Return a connection to the pool, closing it if the pool is full"""
+    if conn.in_transaction:
+        conn.rollback()
+    with _db_pool_lock:
+        idle = _db_pool['idle'].setdefault(name, [])
+        if _db_pool['pid'] == os.getpid() and len(idle) < app.config['SQLITE_POOL_SIZE']:
+            idle.append(conn)
+            return
+    conn.close()
+
+def get_db(name):
+    """Connection to a named database - held for the request, or long-lived outside one"""
+    if has_app_context():
+        connections = g.setdefault('db_connections', {})
+        conn = connections.get(name)
+        if conn is None:
+            conn = connections[name] = _checkout_db(name)
+        return conn
+    
+    # Writer thread, render workers and CLI scripts keep theirs for the life of the thread
+    if getattr(_db_local, 'pid', None) != os.getpid():
+        _db_local.pid = os.getpid()
+        _db_local.connections = {}
+    conn = _db_local.connections.get(name)
+    if conn is None:
+        conn = _db_local.connections[name] = open_named_db(name)
+    return conn
+
+@app.teardown_appcontext
+def release_db_connections(exception):
+    """Give the request's connections back to the pool, rolling back anything left uncommitted"""
+    for name, conn in g.pop('db_connections', {}).items():
+        _checkin_db(name, conn)
+
+# Consent store writer - one thread owns every consents.db write from the web process
+# and group-commits whatever arrives within a few milliseconds
+app.config['WRITE_BATCH_WINDOW_MS'] = 5
+app.config['WRITE_BATCH_MAX'] = 64
+app.config['WRITE_TIMEOUT_SECONDS'] = 30
+
+_writer_state = {'pid': None, 'queue': None}
+_writer_lock = threading.Lock()
+
+def _consent_writer_loop(write_queue):
+    """Writer thread: drain the queue in batches, one transaction per batch"""
+    conn = open_named_db('consents', isolation_level=None)
+    window = app.config['WRITE_BATCH_WINDOW_MS'] / 1000
+    
+    while True:
+        batch = [write_queue.get()]
+        deadline = time.monotonic() + window
+        while len(batch) < app.config['WRITE_BATCH_MAX']:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(write_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        # Writes whose caller timed out were cancelled and are dropped; the rest can no longer be
+        batch = [(mutation, future) for mutation, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            continue
+        
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for mutation, future in batch:
+                # A savepoint per caller so one failing write doesn't sink the batch
+                conn.execute('SAVEPOINT consent_write')
+                try:
+                    outcomes.append((future, mutation(conn), None))
+                    conn.execute('RELEASE consent_write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO consent_write')
+                    conn.execute('RELEASE consent_write')
+                    outcomes.append((future, None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            print(f"❌ Consent write batch failed: {e}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            outcomes = [(future, None, e) for _, future in batch]
+        
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+def submit_consent_write(mutation):
+    """Queue mutation(conn) for the writer thread; the Future resolves after the commit"""
+    with _writer_lock:
+        if _writer_state['pid'] != os.getpid():
+            _writer_state['pid'] = os.getpid()
+            _writer_state['queue'] = queue.Queue()
+            threading.Thread(target=_consent_writer_loop, args=(_writer_state['queue'],),
+                             name='consent-writer', daemon=True).start()
+    
+    future = Future()
+    _writer_state['queue'].put((mutation, future))
+    return future
+
+def write_consents(mutation):
+    """Run a consent store write through the writer thread and wait for its result"""
+    future = submit_consent_write(mutation)
+    try:
+        return future.result(timeout=app.config['WRITE_TIMEOUT_SECONDS'])
+    except FutureTimeoutError:
+        # Still queued - withdraw it so it can't commit after the caller has reported a failure
+        if future.cancel():
+            raise TimeoutError("Consent store is busy, nothing was saved - please try again")
+        # Already inside a transaction, so its outcome is moments away
+        return future.result()
+
 # Hash password function
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -84,193 +269,737 @@ def init_users_database():
     conn.commit()
     conn.close()
 
-# Initialize consent database with multi-signature support
-def init_database():
-    """Initialize the SQLite database with proper schema for multi-signature"""
-    conn = sqlite3.connect('consents.db')
-    c = conn.cursor()
-    
-    # Drop and recreate table to ensure all columns exist
-    c.execute('DROP TABLE IF EXISTS consents')
+# Consent database schema - versioned migrations applied once at boot
+CONSENTS_DB = 'consents.db'
+
+# Canonical consents columns; anything missing on an older database is added by migration 1
+CONSENTS_BASE_COLUMNS = [
+    ('patient_name', 'TEXT'),
+    ('patient_age', 'INTEGER'),
+    ('patient_mrn', 'TEXT'),
+    ('consent_type', 'TEXT'),
+    ('original_pdf', 'TEXT'),
+    ('final_pdf', 'TEXT'),
+    ('counsellor_id', 'TEXT'),
+    ('signatory_name', 'TEXT'),
+    ('signatory_relation', 'TEXT'),
+    ('signatory_mobile', 'TEXT'),
+    ('consent_required_for', 'TEXT'),
+    ('consent_required_for_ml', 'TEXT'),
+    ('procedure_details', 'TEXT'),
+    ('procedure_details_ml', 'TEXT'),
+    ('doctor_name', 'TEXT'),
+    ('nurse_signed_by', 'TEXT'),
+    ('nurse_signed_at', 'TIMESTAMP'),
+    ('doctor_signed_by', 'TEXT'),
+    ('doctor_signed_at', 'TIMESTAMP'),
+    ('created_at', 'TIMESTAMP')
+]
+
+# Workflow status - kept in sync by each signing route
+CONSENT_STATUSES = ['awaiting_patient', 'awaiting_nurse', 'awaiting_doctor', 'completed']
+CONSENT_STATUS_SQL = '''CASE
+    WHEN patient_signature_hash IS NULL THEN 'awaiting_patient'
+    WHEN nurse_signature_hash IS NULL THEN 'awaiting_nurse'
+    WHEN doctor_signature_hash IS NULL THEN 'awaiting_doctor'
+    ELSE 'completed' END'''
+
+# Columns indexed by the consents_fts full-text table
+CONSENTS_FTS_COLUMNS = ['patient_name', 'patient_mrn', 'consent_required_for', 'procedure_details', 'procedure_details_ml']
+CONSENT_SEARCH_LIMIT = 20
+
+# Column set of the migrated schema, cached at boot
+CONSENTS_SCHEMA = {'version': 0, 'pending': [], 'columns': frozenset(), 'fts': False}
+
+def _consents_columns(conn):
+    return [column[1] for column in conn.execute("PRAGMA table_info(consents)")]
+
+def _add_missing_columns(conn, columns):
+    existing = _consents_columns(conn)
+    for name, column_type in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE consents ADD COLUMN {name} {column_type}')
+            print(f"✅ Added column consents.{name}")
+
+def _migration_1_base_schema(conn):
+    """Multi-signature consents table - also upgrades the reset_database.py layout"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS consents
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    _add_missing_columns(conn, CONSENTS_BASE_COLUMNS)
+
+def _migration_2_signature_blobs(conn):
+    """Signatures move out of the row into the content-addressed blob store - commits as it goes"""
+    migrate_inline_signatures(conn)
+
+def _migration_3_render_tracking(conn):
+    """Columns used by stamping, the render pool and bulk regeneration"""
+    _add_missing_columns(conn, [
+        ('signature_layout', 'TEXT'),
+        ('render_status', 'TEXT'),
+        ('render_error', 'TEXT'),
+        ('render_fingerprint', 'TEXT')
+    ])
+
+def _migration_4_listing_index(conn):
+    """Keyset pagination index for the consents list"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_consents_created ON consents (created_at, id)')
+
+def _migration_5_workflow_status(conn):
+    """Materialized workflow status with covering indexes for the work queues"""
+    _add_missing_columns(conn, [('status', 'TEXT')])
+    conn.execute(f'UPDATE consents SET status = {CONSENT_STATUS_SQL}')
+    # Covers the nurse/doctor dashboard queries so they never touch the table
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_consents_status_created
+                    ON consents (status, created_at, patient_name, patient_mrn, consent_required_for, doctor_name)''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_consents_mrn ON consents (patient_mrn, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_consents_doctor ON consents (doctor_name, created_at)')
+
+def _migration_6_full_text_search(conn):
+    """FTS5 index over patient, MRN and procedure text, kept in sync by triggers"""
+    # unicode61 drops combining marks by default, which splits Malayalam words at
+    # every vowel sign and virama - keep the M* categories inside tokens
+    try:
+        conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS consents_fts USING fts5(
+                            {', '.join(CONSENTS_FTS_COLUMNS)},
+                            content='consents', content_rowid='id',
+                            tokenize="unicode61 categories 'L* N* Co M*'",
+                            prefix='2 3')''')
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ SQLite has no FTS5 support, consent search disabled: {e}")
+        return False
     
-    # Create new table with ALL required columns including multi-signature support
-    c.execute('''CREATE TABLE consents
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  patient_name TEXT,
-                  patient_age INTEGER,
-                  patient_mrn TEXT,
-                  consent_type TEXT,
-                  original_pdf TEXT,
-                  final_pdf TEXT,
-                  patient_signature_data TEXT,
-                  relative_signature_data TEXT,
-                  nurse_signature_data TEXT,
-                  doctor_signature_data TEXT,
-                  counsellor_id TEXT,
-                  signatory_name TEXT,
-                  signatory_relation TEXT,
-                  signatory_mobile TEXT,
-                  consent_required_for TEXT,
-                  consent_required_for_ml TEXT,
-                  procedure_details TEXT,
-                  procedure_details_ml TEXT,
-                  doctor_name TEXT,
-                  nurse_signed_by TEXT,
-                  nurse_signed_at TIMESTAMP,
-                  doctor_signed_by TEXT,
-                  doctor_signed_at TIMESTAMP,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    print("✅ Created NEW database with MULTI-SIGNATURE support")
+    columns = ', '.join(CONSENTS_FTS_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in CONSENTS_FTS_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in CONSENTS_FTS_COLUMNS)
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS consents_fts_insert AFTER INSERT ON consents BEGIN
+                        INSERT INTO consents_fts (rowid, {columns}) VALUES (new.id, {new_values});
+                     END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS consents_fts_delete AFTER DELETE ON consents BEGIN
+                        INSERT INTO consents_fts (consents_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                     END''')
+    # Only searchable columns - signature and status updates don't touch the index
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS consents_fts_update AFTER UPDATE OF {columns} ON consents BEGIN
+                        INSERT INTO consents_fts (consents_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                        INSERT INTO consents_fts (rowid, {columns}) VALUES (new.id, {new_values});
+                     END''')
+    conn.execute("INSERT INTO consents_fts (consents_fts) VALUES ('rebuild')")
+
+def _migration_7_pdf_size(conn):
+    """Byte size of each consent PDF, for tracking output size over time"""
+    _add_missing_columns(conn, [('pdf_bytes', 'INTEGER')])
+
+def _migration_8_render_versions(conn):
+    """Data version of each consent and the version its PDF reflects, so renders apply in order across processes"""
+    _add_missing_columns(conn, [
+        ('render_version', 'INTEGER DEFAULT 0'),
+        ('rendered_version', 'INTEGER')
+    ])
+    conn.execute("UPDATE consents SET rendered_version = 0 WHERE render_status = 'ready'")
+
+def _migration_9_created_at_default(conn):
+    """created_at for tables where migration 1 had to add it - ALTER TABLE can't give it a CURRENT_TIMESTAMP default"""
+    # Rows from before the column existed sort first in the consents list
+    conn.execute('''UPDATE consents SET created_at = COALESCE((SELECT MIN(created_at) FROM consents), CURRENT_TIMESTAMP)
+                    WHERE created_at IS NULL''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS consents_created_at_default AFTER INSERT ON consents
+                    WHEN new.created_at IS NULL BEGIN
+                        UPDATE consents SET created_at = CURRENT_TIMESTAMP WHERE id = new.id;
+                    END''')
+
+CONSENTS_MIGRATIONS = [
+    (1, _migration_1_base_schema),
+    (2, _migration_2_signature_blobs),
+    (3, _migration_3_render_tracking),
+    (4, _migration_4_listing_index),
+    (5, _migration_5_workflow_status),
+    (6, _migration_6_full_text_search),
+    (7, _migration_7_pdf_size),
+    (8, _migration_8_render_versions),
+    (9, _migration_9_created_at_default)
+]
+
+def migrate_consents_database(db_path=CONSENTS_DB):
+    """Bring consents.db up to the latest schema version and cache its column set"""
+    # Each step runs under the write lock, so concurrently starting workers apply it once
+    conn = sqlite3.connect(db_path, timeout=app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000, isolation_level=None)
+    conn.execute('CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT)')
+    
+    def read_state():
+        rows = dict(conn.execute("SELECT key, value FROM schema_meta WHERE key IN ('schema_version', 'pending_migrations')").fetchall())
+        return int(rows.get('schema_version', 0)), json.loads(rows.get('pending_migrations', '[]'))
+    
+    for migration_version, migration in CONSENTS_MIGRATIONS:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version, pending = read_state()
+            # A step that returned False (e.g. FTS5 missing) stays pending and is retried on every start
+            if migration_version <= version and migration_version not in pending:
+                conn.execute('COMMIT')
+                continue
+            applied = migration(conn) is not False
+            if applied:
+                pending = [step for step in pending if step != migration_version]
+            elif migration_version not in pending:
+                pending.append(migration_version)
+            conn.execute("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('schema_version', ?)", (str(max(version, migration_version)),))
+            conn.execute("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('pending_migrations', ?)", (json.dumps(pending),))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            conn.close()
+            raise
+        if applied:
+            print(f"✅ consents.db migrated to schema version {migration_version}")
+        else:
+            print(f"⚠️ consents.db migration {migration_version} not applied, will retry on next start")
     
-    conn.commit()
+    version, pending = read_state()
+    CONSENTS_SCHEMA['version'] = version
+    CONSENTS_SCHEMA['pending'] = pending
+    CONSENTS_SCHEMA['columns'] = frozenset(_consents_columns(conn))
+    CONSENTS_SCHEMA['fts'] = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'consents_fts'").fetchone() is not None
     conn.close()
+    return version
+
+_consents_schema_lock = threading.Lock()
+
+@app.before_request
+def ensure_consents_schema():
+    """Apply pending migrations before the first request - WSGI servers never run __main__"""
+    if CONSENTS_SCHEMA['version']:
+        return
+    with _consents_schema_lock:
+        if not CONSENTS_SCHEMA['version']:
+            migrate_consents_database()
+
+# Initialize consent database with multi-signature support
+def init_database():
+    """Initialize the SQLite database - applies any pending schema migrations"""
+    version = migrate_consents_database()
+    print(f"✅ consents.db ready at schema version {version} with MULTI-SIGNATURE support")
+
+# Signature blob store - signatures are decoded once at ingest and kept as raw PNG keyed by SHA-256
+SIGNATURE_ROLES = ['patient', 'relative', 'nurse', 'doctor']
+
+def init_signature_blobs(conn):
+    """Create the content-addressed signature blob table"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS signature_blobs
+                    (sha256 TEXT PRIMARY KEY,
+                     png BLOB NOT NULL,
+                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+def decode_signature_data(signature_data):
+    """Decode a canvas data URL into raw image bytes"""
+    if not signature_data or not signature_data.startswith('data:image'):
+        return None
+    return base64.b64decode(signature_data.split(',')[1])
+
+# Signature ingest normalization - crop to the ink, downscale to print size, store as 1-bit PNG
+SIGNATURE_BOX_POINTS = (120, 50)  # size of a signature box on the consent PDF
+SIGNATURE_PRINT_DPI = 300
+SIGNATURE_INK_PADDING = 4
+
+def normalize_signature_png(signature_png):
+    """Normalize a canvas signature once at ingest; returns the original bytes if it can't"""
+    try:
+        image = Image.open(io.BytesIO(signature_png)).convert('RGBA')
+        
+        # Ink = visible pixels that aren't near-white background
+        visible = image.getchannel('A').point(lambda a: 255 if a > 32 else 0)
+        dark = image.convert('L').point(lambda v: 255 if v < 224 else 0)
+        ink = ImageChops.multiply(visible, dark)
+        bbox = ink.getbbox()
+        if not bbox:
+            return signature_png
+        
+        # Crop to the ink bounding box with a little breathing room
+        left, top, right, bottom = bbox
+        bbox = (max(left - SIGNATURE_INK_PADDING, 0), max(top - SIGNATURE_INK_PADDING, 0),
+                min(right + SIGNATURE_INK_PADDING, image.width), min(bottom + SIGNATURE_INK_PADDING, image.height))
+        image = image.crop(bbox)
+        ink = ink.crop(bbox)
+        
+        # Downscale to the print resolution of the signature box
+        max_size = tuple(int(points * SIGNATURE_PRINT_DPI / 72) for points in SIGNATURE_BOX_POINTS)
+        if image.width > max_size[0] or image.height > max_size[1]:
+            scale = min(max_size[0] / image.width, max_size[1] / image.height)
+            new_size = (max(int(image.width * scale), 1), max(int(image.height * scale), 1))
+            image = image.resize(new_size, Image.LANCZOS)
+            ink = ink.resize(new_size, Image.LANCZOS)
+        ink = ink.point(lambda v: 255 if v >= 64 else 0).convert('1')
+        
+        # Two-colour palette: transparent background + average ink colour
+        ink_color = [int(channel) for channel in ImageStat.Stat(image.convert('RGB'), ink).mean]
+        normalized = Image.new('P', image.size, 0)
+        normalized.putpalette([255, 255, 255] + ink_color)
+        normalized.paste(1, mask=ink)
+        
+        output = io.BytesIO()
+        normalized.save(output, 'PNG', optimize=True, transparency=0, bits=1)
+        return output.getvalue()
+    except Exception as e:
+        print(f"⚠️ Could not normalize signature, storing as posted: {e}")
+        return signature_png
+
+def prepare_signature_blob(signature_data):
+    """Decode and normalize a posted signature - returns (hash, png), CPU work only"""
+    signature_png = decode_signature_data(signature_data)
+    if not signature_png:
+        return None, None
+    signature_png = normalize_signature_png(signature_png)
+    return hashlib.sha256(signature_png).hexdigest(), signature_png
+
+def insert_signature_blob(conn, signature_blob):
+    """Insert a prepared signature blob and return its hash - identical signatures share a row"""
+    signature_hash, signature_png = signature_blob
+    if signature_hash:
+        conn.execute('INSERT OR IGNORE INTO signature_blobs (sha256, png) VALUES (?, ?)', (signature_hash, signature_png))
+    return signature_hash
+
+def load_signature_blob(conn, signature_hash):
+    """Fetch a stored signature as a (hash, png) blob, or None"""
+    if not signature_hash:
+        return None
+    row = conn.execute('SELECT png FROM signature_blobs WHERE sha256 = ?', (signature_hash,)).fetchone()
+    return (signature_hash, row[0]) if row else None
+
+SIGNATURE_MIGRATION_BATCH_SIZE = 500
+
+def migrate_inline_signatures(conn):
+    """Move legacy base64 *_signature_data columns into the blob store, committing batch by batch"""
+    init_signature_blobs(conn)
+    columns = _consents_columns(conn)
+    _add_missing_columns(conn, [(f'{role}_signature_hash', 'TEXT') for role in SIGNATURE_ROLES])
+    
+    legacy_roles = [role for role in SIGNATURE_ROLES if f'{role}_signature_data' in columns]
+    for role in legacy_roles:
+        total = conn.execute(f'SELECT COUNT(*) FROM consents WHERE {role}_signature_data IS NOT NULL').fetchone()[0]
+        moved = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(f'''SELECT id, {role}_signature_data FROM consents
+                                    WHERE id > ? AND {role}_signature_data IS NOT NULL
+                                    ORDER BY id LIMIT ?''', (last_id, SIGNATURE_MIGRATION_BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            # Moved rows are NULLed, so committed batches are the progress record - an interrupted
+            # migration resumes where it stopped. The write lock is released while Pillow works
+            conn.commit()
+            blobs = [(consent_id, prepare_signature_blob(signature_data)) for consent_id, signature_data in rows]
+            conn.execute('BEGIN IMMEDIATE')
+            for consent_id, signature_blob in blobs:
+                signature_hash = insert_signature_blob(conn, signature_blob)
+                conn.execute(f'''UPDATE consents SET {role}_signature_hash = ?, {role}_signature_data = NULL
+                                 WHERE id = ? AND {role}_signature_data IS NOT NULL''', (signature_hash, consent_id))
+            moved += len(rows)
+            print(f"🔄 Moved {moved}/{total} {role} signatures into the blob store")
+        if moved:
+            print(f"✅ Moved {moved} {role} signatures into the blob store")
 
 # Get all users
 def get_all_users():
-    conn = sqlite3.connect('users.db')
+    conn = get_db('users')
     c = conn.cursor()
     c.execute('SELECT id, username, user_type, full_name, department, is_active, created_at, last_login FROM users ORDER BY user_type, username')
     users = c.fetchall()
-    conn.close()
     return users
 
 # Get user by username
 def get_user_by_username(username):
-    conn = sqlite3.connect('users.db')
+    conn = get_db('users')
     c = conn.cursor()
     c.execute('SELECT * FROM users WHERE username = ?', (username,))
     user = c.fetchone()
-    conn.close()
     return user
 
 # Add new user
 def add_user(username, password, user_type, full_name, department):
-    conn = sqlite3.connect('users.db')
+    conn = get_db('users')
     c = conn.cursor()
     try:
         password_hash = hash_password(password)
         c.execute('INSERT INTO users (username, password_hash, user_type, full_name, department, is_active) VALUES (?, ?, ?, ?, ?, ?)',
                   (username, password_hash, user_type, full_name, department, 1))
         conn.commit()
-        conn.close()
         return True
     except sqlite3.IntegrityError:
-        conn.close()
         return False
 
 # Update user
 def update_user(user_id, username, user_type, full_name, department, is_active):
-    conn = sqlite3.connect('users.db')
+    conn = get_db('users')
     c = conn.cursor()
     try:
         c.execute('UPDATE users SET username = ?, user_type = ?, full_name = ?, department = ?, is_active = ? WHERE id = ?',
                   (username, user_type, full_name, department, is_active, user_id))
         conn.commit()
-        conn.close()
         return True
     except sqlite3.IntegrityError:
-        conn.close()
         return False
 
 # Reset user password
 def reset_user_password(user_id, new_password):
-    conn = sqlite3.connect('users.db')
+    conn = get_db('users')
     c = conn.cursor()
     password_hash = hash_password(new_password)
     c.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
     conn.commit()
-    conn.close()
 
 # Delete user
 def delete_user(user_id):
-    conn = sqlite3.connect('users.db')
+    conn = get_db('users')
     c = conn.cursor()
     c.execute('DELETE FROM users WHERE id = ?', (user_id,))
     conn.commit()
-    conn.close()
 
 # Update last login
 def update_last_login(username):
-    conn = sqlite3.connect('users.db')
+    conn = get_db('users')
     c = conn.cursor()
     current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     c.execute('UPDATE users SET last_login = ? WHERE username = ?', (current_time, username))
     conn.commit()
-    conn.close()
 
-def setup_fonts():
-    """Setup Malayalam fonts for PDF generation with better font detection"""
-    fonts_dir = "fonts"
-    os.makedirs(fonts_dir, exist_ok=True)
-    
-    # Check for common Malayalam fonts in order of preference
-    malayalam_fonts = [
-        "Manjari-Regular.ttf",
-        "Manjari-Bold.ttf", 
-        "NotoSansMalayalam-Regular.ttf",
-        "NotoSansMalayalam-Bold.ttf",
-        "Rachana-Regular.ttf", 
-        "AnjaliOldLipi-Regular.ttf",
-        "Arial Unicode MS.ttf"  # Fallback for Windows
-    ]
-    
-    registered_fonts = []
-    
-    for font_file in malayalam_fonts:
+# Font registry - parsed once per process and shared by every render
+FONTS_DIR = "fonts"
+FONT_CACHE_FILE = os.path.join(FONTS_DIR, '.font_cache.json')
+MALAYALAM_FONT_FILES = [
+    "Manjari-Regular.ttf",
+    "Manjari-Bold.ttf", 
+    "NotoSansMalayalam-Regular.ttf",
+    "NotoSansMalayalam-Bold.ttf",
+    "Rachana-Regular.ttf", 
+    "AnjaliOldLipi-Regular.ttf",
+    "Arial Unicode MS.ttf"  # Fallback for Windows
+]
+
+_font_registry = {
+    'loaded': False,
+    'fonts': {},                  # font name -> parsed TTFont
+    'malayalam_font': 'Helvetica'
+}
+_font_lock = threading.Lock()
+
+def _font_files_signature(fonts_dir):
+    """Signature of the font files on disk, used to validate the metrics cache"""
+    signature = []
+    for font_file in MALAYALAM_FONT_FILES:
         font_path = os.path.join(fonts_dir, font_file)
-        if os.path.exists(font_path):
-            try:
-                font_name = font_file.replace('.ttf', '').replace('-', '')
-                pdfmetrics.registerFont(TTFont(font_name, font_path))
-                registered_fonts.append(font_name)
-                print(f"✅ Malayalam font loaded: {font_file} as '{font_name}'")
-            except Exception as e:
-                print(f"⚠️ Failed to load {font_file}: {e}")
+        try:
+            stat = os.stat(font_path)
+        except OSError:
+            continue
+        signature.append((font_file, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def _pack_numbers(values, typecode):
+    """Numbers as a base64 machine array - large glyph tables load in microseconds"""
+    return base64.b64encode(array(typecode, values).tobytes()).decode('ascii')
+
+def _unpack_numbers(data, typecode):
+    """Inverse of _pack_numbers"""
+    numbers = array(typecode)
+    numbers.frombytes(base64.b64decode(data))
+    return numbers.tolist()
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _encode_metric(value):
+    """Parsed font data as plain JSON - bytes, tuples and glyph tables are tagged"""
+    if isinstance(value, TTFNameBytes):
+        return {'name_bytes': value.decode('latin-1')}
+    if isinstance(value, bytes):
+        return {'bytes': value.decode('latin-1')}
+    if isinstance(value, tuple):
+        return {'tuple': [_encode_metric(v) for v in value]}
+    if isinstance(value, list):
+        if value and all(_is_int(v) for v in value):
+            return {'ints': _pack_numbers(value, 'q')}
+        if value and all(isinstance(v, tuple) and len(v) == 2 and _is_int(v[0]) and _is_int(v[1]) for v in value):
+            return {'int_pairs': [_pack_numbers([v[0] for v in value], 'q'), _pack_numbers([v[1] for v in value], 'q')]}
+        return [_encode_metric(v) for v in value]
+    if isinstance(value, dict):
+        if value and all(_is_int(k) for k in value):
+            if all(_is_int(v) for v in value.values()):
+                return {'int_map': [_pack_numbers(value.keys(), 'q'), _pack_numbers(value.values(), 'q')]}
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value.values()):
+                return {'float_map': [_pack_numbers(value.keys(), 'q'), _pack_numbers(value.values(), 'd')]}
+        return {'items': [[_encode_metric(k), _encode_metric(v)] for k, v in value.items()]}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"unexpected font metric type {type(value).__name__}")
+
+def _decode_metric(value):
+    """Inverse of _encode_metric"""
+    if isinstance(value, list):
+        return [_decode_metric(v) for v in value]
+    if isinstance(value, dict):
+        if 'name_bytes' in value:
+            return TTFNameBytes(value['name_bytes'].encode('latin-1'))
+        if 'bytes' in value:
+            return value['bytes'].encode('latin-1')
+        if 'tuple' in value:
+            return tuple(_decode_metric(v) for v in value['tuple'])
+        if 'ints' in value:
+            return _unpack_numbers(value['ints'], 'q')
+        if 'int_pairs' in value:
+            return list(zip(_unpack_numbers(value['int_pairs'][0], 'q'), _unpack_numbers(value['int_pairs'][1], 'q')))
+        if 'int_map' in value:
+            return dict(zip(_unpack_numbers(value['int_map'][0], 'q'), _unpack_numbers(value['int_map'][1], 'q')))
+        if 'float_map' in value:
+            return dict(zip(_unpack_numbers(value['float_map'][0], 'q'), _unpack_numbers(value['float_map'][1], 'd')))
+        return {_decode_metric(k): _decode_metric(v) for k, v in value['items']}
+    return value
+
+def _cache_signature(signature):
+    """Font file signature plus the reportlab version whose parser produced the metrics"""
+    return [REPORTLAB_VERSION, sys.byteorder] + [list(entry) for entry in signature]
+
+def _load_font_cache(signature):
+    """Rebuild parsed fonts from the on-disk metrics if they match the font files"""
+    try:
+        with open(FONT_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('signature') != _cache_signature(signature):
+            return None
+        
+        fonts = {}
+        for font_name, metrics in cached['fonts'].items():
+            face = TTFontFace.__new__(TTFontFace)
+            face.__dict__.update({key: _decode_metric(value) for key, value in metrics.items()})
+            # Glyph data for subsetting comes from the font file itself, not the cache
+            with open(face.filename, 'rb') as font_file:
+                face._ttf_data = font_file.read()
+            
+            font = TTFont.__new__(TTFont)
+            font.fontName = font_name
+            font.face = face
+            font.encoding = TTEncoding()
+            font.state = WeakKeyDictionary()
+            font._asciiReadable = rl_config.ttfAsciiReadable
+            fonts[font_name] = font
+        return fonts
+    except Exception:
+        return None
+
+def _save_font_cache(signature, fonts):
+    """Write parsed font metrics to the on-disk cache atomically"""
+    temp_path = FONT_CACHE_FILE + '.tmp'
+    try:
+        cached = {
+            'signature': _cache_signature(signature),
+            'fonts': {font_name: {key: _encode_metric(value) for key, value in font.face.__dict__.items() if key != '_ttf_data'}
+                      for font_name, font in fonts.items()}
+        }
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cached, f, separators=(',', ':'))
+        os.replace(temp_path, FONT_CACHE_FILE)
+    except Exception as e:
+        print(f"⚠️ Could not write font cache: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+def setup_fonts():
+    """Setup Malayalam fonts for PDF generation - runs once per process"""
+    if _font_registry['loaded']:
+        return _font_registry['malayalam_font'] != 'Helvetica'
     
-    if registered_fonts:
-        # Use the first successfully loaded font
-        app.config['MALAYALAM_FONT'] = registered_fonts[0]
-        print(f"✅ Primary Malayalam font set to: {app.config['MALAYALAM_FONT']}")
-        return True
-    else:
-        print("❌ No Malayalam font found. Using system fallback.")
-        # Try to use system fonts as fallback
-        system_fonts = ['Arial', 'Helvetica']
-        for font in system_fonts:
-            try:
-                pdfmetrics.registerFont(TTFont(font, font))
-                print(f"✅ Using system font: {font}")
-                app.config['MALAYALAM_FONT'] = font
-                return True
-            except:
-                continue
-        app.config['MALAYALAM_FONT'] = 'Helvetica'
-        return False
+    with _font_lock:
+        if _font_registry['loaded']:
+            return _font_registry['malayalam_font'] != 'Helvetica'
+        
+        os.makedirs(FONTS_DIR, exist_ok=True)
+        signature = _font_files_signature(FONTS_DIR)
+        
+        # Reuse parsed metrics from a previous process when the files are unchanged
+        fonts = _load_font_cache(signature) if signature else None
+        if fonts is None:
+            fonts = {}
+            for font_file, _, _ in signature:
+                font_path = os.path.join(FONTS_DIR, font_file)
+                try:
+                    font_name = font_file.replace('.ttf', '').replace('-', '')
+                    fonts[font_name] = TTFont(font_name, font_path)
+                    print(f"✅ Malayalam font loaded: {font_file} as '{font_name}'")
+                except Exception as e:
+                    print(f"⚠️ Failed to load {font_file}: {e}")
+            if fonts:
+                _save_font_cache(signature, fonts)
+        
+        for font_name, font in fonts.items():
+            pdfmetrics.registerFont(font)
+        
+        if fonts:
+            # Use the first successfully loaded font
+            malayalam_font = next(iter(fonts))
+            print(f"✅ Primary Malayalam font set to: {malayalam_font}")
+        else:
+            print("❌ No Malayalam font found. Using system fallback.")
+            malayalam_font = 'Helvetica'
+            # Try to use system fonts as fallback
+            system_fonts = ['Arial', 'Helvetica']
+            for font in system_fonts:
+                try:
+                    fonts[font] = TTFont(font, font)
+                    pdfmetrics.registerFont(fonts[font])
+                    print(f"✅ Using system font: {font}")
+                    malayalam_font = font
+                    break
+                except:
+                    continue
+        
+        _font_registry['fonts'] = fonts
+        _font_registry['malayalam_font'] = malayalam_font
+        _font_registry['loaded'] = True
+        app.config['MALAYALAM_FONT'] = malayalam_font
+        return malayalam_font != 'Helvetica'
+
+def get_malayalam_font():
+    """Resolved Malayalam font name from the font registry"""
+    setup_fonts()
+    return _font_registry['malayalam_font']
+
+# Text cleanup patterns - compiled once, applied to every string that reaches a PDF
+CLEAN_TEXT_DISALLOWED_RE = re.compile(r'[^\u0D00-\u0D7F\s\w\.,!?\-\(\)]')  # Keep Malayalam range + basic punctuation
+CLEAN_TEXT_SPACES_RE = re.compile(r' {2,}')
 
 def clean_text_for_pdf(text):
     """Clean text for PDF rendering - preserve Malayalam characters"""
     if not text:
         return ""
     
-    # Remove black squares/dots and other unwanted characters but preserve Malayalam
-    text = text.replace('■', '').replace('●', '').replace('•', '-')
-    
-    # Fix common encoding issues but preserve Unicode
-    text = text.replace('\x00', '')  # Remove null characters
-    
-    # Normalize line breaks
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    # Drop black squares/dots and nulls, turn bullets into dashes, normalize line breaks.
+    # Chained replace beats str.translate here - translate is slow on non-ASCII text
+    text = (text.replace('■', '').replace('●', '').replace('•', '-').replace('\x00', '')
+                .replace('\r\n', '\n').replace('\r', '\n'))
+    
+    # Neither pattern crosses a line break, so both run over the whole text at once
+    text = CLEAN_TEXT_DISALLOWED_RE.sub('', text)
+    text = CLEAN_TEXT_SPACES_RE.sub(' ', text)
+    return '\n'.join([line.strip() for line in text.split('\n')])
+
+# Glyph width tables - per-font advance widths filled in as characters are first seen,
+# summed exactly the way reportlab's stringWidth does so line breaks don't change
+GLYPH_WORD_CACHE_SIZE = 50000
+
+class _GlyphWidths(dict):
+    """Unscaled advance width per character for one font"""
+    
+    def __init__(self, font):
+        super().__init__()
+        self.font = font
+        self.word_widths = {}  # (word, size) -> scaled width; words repeat far more than they vary
+        if isinstance(font, TTFont):
+            self.kind = 'ttf'
+        elif isinstance(getattr(font, 'widths', None), list):
+            self.kind = 't1'
+        else:
+            self.kind = 'other'
     
-    # Remove extra whitespace but preserve meaningful spaces
-    lines = text.split('\n')
-    cleaned_lines = []
-    for line in lines:
-        # Clean each line but preserve Malayalam text
-        cleaned_line = re.sub(r'[^\u0D00-\u0D7F\s\w\.,!?\-\(\)]', '', line)  # Keep Malayalam range + basic punctuation
-        cleaned_line = re.sub(r' +', ' ', cleaned_line)
-        cleaned_lines.append(cleaned_line.strip())
+    def __missing__(self, char):
+        if self.kind == 'ttf':
+            width = self.font.face.charWidths.get(ord(char), self.font.face.defaultWidth)
+        else:
+            width = sum(sum(map(f.widths.__getitem__, t))
+                        for f, t in pdfmetrics.unicode2T1(char, [self.font] + self.font.substitutionFonts))
+        self[char] = width
+        return width
+    
+    def string_width(self, text, font_size):
+        """Same result as pdfmetrics.stringWidth(text, font, font_size)"""
+        key = (text, font_size)
+        width = self.word_widths.get(key)
+        if width is not None:
+            return width
+        
+        if self.kind == 'ttf':
+            width = 0.001 * font_size * sum(map(self.__getitem__, text))
+        elif self.kind == 't1':
+            width = sum(map(self.__getitem__, text)) * 0.001 * font_size
+        else:
+            width = self.font.stringWidth(text, font_size)
+        if len(self.word_widths) >= GLYPH_WORD_CACHE_SIZE:
+            self.word_widths.clear()
+        self.word_widths[key] = width
+        return width
+
+_glyph_widths = {}
+
+def get_glyph_widths(font_name):
+    """Glyph width table for a registered font"""
+    widths = _glyph_widths.get(font_name)
+    if widths is None:
+        widths = _glyph_widths[font_name] = _GlyphWidths(pdfmetrics.getFont(font_name))
+    return widths
+
+def wrap_paragraph(paragraph, font_name, font_size, max_width):
+    """Break one paragraph into lines no wider than max_width - greedy, one pass over the words"""
+    try:
+        widths = get_glyph_widths(font_name)
+    except Exception:
+        widths = None
     
-    return '\n'.join(cleaned_lines)
+    lines = []
+    current_line = []
+    current_width = 0
+    for word in paragraph.split(' '):
+        try:
+            word_width = widths.string_width(word + ' ', font_size)
+        except:
+            # Fallback if font doesn't support the character
+            word_width = len(word) * font_size * 0.6
+        
+        if current_width + word_width <= max_width:
+            current_line.append(word)
+            current_width += word_width
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+            current_line = [word]
+            current_width = word_width
+    
+    if current_line:
+        lines.append(' '.join(current_line))
+    return lines
+
+# Paragraph layout cache - template paragraphs repeat across consents and signing stages,
+# so their line breaks are computed once per process
+PARAGRAPH_LAYOUT_CACHE_SIZE = 4096
+
+_paragraph_layouts = OrderedDict()  # (paragraph digest, font, size, max width) -> lines
+_paragraph_layout_lock = threading.Lock()
+_paragraph_layout_stats = {'hits': 0, 'misses': 0}
+
+def layout_paragraph(paragraph, font_name, font_size, max_width):
+    """Line breaks for a paragraph, from the bounded layout cache"""
+    key = (hashlib.blake2b(paragraph.encode('utf-8'), digest_size=16).digest(), font_name, font_size, max_width)
+    with _paragraph_layout_lock:
+        lines = _paragraph_layouts.get(key)
+        if lines is not None:
+            _paragraph_layouts.move_to_end(key)
+            _paragraph_layout_stats['hits'] += 1
+            return lines
+        _paragraph_layout_stats['misses'] += 1
+    
+    lines = tuple(wrap_paragraph(paragraph, font_name, font_size, max_width))
+    with _paragraph_layout_lock:
+        _paragraph_layouts[key] = lines
+        if len(_paragraph_layouts) > PARAGRAPH_LAYOUT_CACHE_SIZE:
+            _paragraph_layouts.popitem(last=False)
+    return lines
+
+def paragraph_layout_cache_info():
+    """Hit/miss counters and hit rate for the paragraph layout cache"""
+    with _paragraph_layout_lock:
+        lookups = _paragraph_layout_stats['hits'] + _paragraph_layout_stats['misses']
+        return dict(_paragraph_layout_stats, size=len(_paragraph_layouts), max_size=PARAGRAPH_LAYOUT_CACHE_SIZE,
+                    hit_rate=_paragraph_layout_stats['hits'] / lookups if lookups else 0.0)
 
 def draw_wrapped_text(can, text, x, y, max_width, font_name, font_size, line_height):
     """Draw text with proper wrapping - IMPROVED FOR MALAYALAM"""
@@ -281,8 +1010,8 @@ def draw_wrapped_text(can, text, x, y, max_width, font_name, font_size, line_hei
     text = clean_text_for_pdf(text)
     
     # Set font - use Malayalam font if available
-    if font_name == "Malayalam" and 'MALAYALAM_FONT' in app.config:
-        actual_font = app.config['MALAYALAM_FONT']
+    if font_name == "Malayalam":
+        actual_font = get_malayalam_font()
         # Use slightly larger font for better readability
         effective_font_size = max(font_size, 10)
     else:
@@ -296,35 +1025,13 @@ def draw_wrapped_text(can, text, x, y, max_width, font_name, font_size, line_hei
         if not paragraph.strip():
             lines.append("")
             continue
-            
-        # For Malayalam, we need to handle text differently
-        words = paragraph.split(' ')
-        current_line = []
-        current_width = 0
-        
-        for word in words:
-            try:
-                word_width = can.stringWidth(word + ' ', actual_font, effective_font_size)
-            except:
-                # Fallback if font doesn't support the character
-                word_width = len(word) * effective_font_size * 0.6
-                
-            if current_width + word_width <= max_width:
-                current_line.append(word)
-                current_width += word_width
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-                current_width = word_width
-        
-        if current_line:
-            lines.append(' '.join(current_line))
+        lines.extend(layout_paragraph(paragraph, actual_font, effective_font_size, max_width))
     
     # Draw lines
     for line in lines:
         if y < 100:  # Bottom margin
             can.showPage()
+            width, height = A4
             add_header_to_new_page(can, width, height)
             y = height - 150
         
@@ -345,37 +1052,516 @@ def draw_wrapped_text(can, text, x, y, max_width, font_name, font_size, line_hei
     
     return y
 
-def get_consent_types():
-    """Get available consent types from template files"""
-    consent_types = {}
-    forms_folder = app.config['UPLOAD_FOLDER']
-    
-    if not os.path.exists(forms_folder):
-        os.makedirs(forms_folder)
-        # Create sample template files if none exist
-        create_sample_templates(forms_folder)
-        return get_consent_types()  # Recursive call to read the created templates
-    
-    for filename in os.listdir(forms_folder):
-        if filename.lower().endswith('.txt'):
-            # Create a nice display name
-            display_name = filename.replace('.txt', '').replace('_', ' ').title()
-            
-            # Read template content
+# Translation cache - English -> Malayalam pairs in translations.db behind a bounded LRU.
+# Nothing is opened until the first lookup; the legacy JSON file is imported once.
+TRANSLATION_CACHE_JSON = 'translation_cache.json'
+TRANSLATION_CACHE_SIZE = 2048
+TRANSLATION_LANGUAGE = 'ml'
+
+_translation_cache = OrderedDict()  # (lang, normalized key) -> translation
+_translation_lock = threading.Lock()
+_translation_stats = {'hits': 0, 'misses': 0, 'db_hits': 0}
+_translation_store_ready = set()  # pids that have created the table and run the importer
+
+def normalize_translation_key(text):
+    """Cache key for a source string - whitespace collapsed and case folded"""
+    return ' '.join(text.split()).casefold()
+
+def _translation_db():
+    """Connection to translations.db, creating the store on first use in this process"""
+    conn = get_db('translations')
+    if os.getpid() in _translation_store_ready:
+        return conn
+    
+    with _translation_lock:
+        if os.getpid() not in _translation_store_ready:
+            with conn:
+                conn.execute('''CREATE TABLE IF NOT EXISTS translations
+                                (lang TEXT NOT NULL,
+                                 key TEXT NOT NULL,
+                                 source TEXT NOT NULL,
+                                 translation TEXT NOT NULL,
+                                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                                 PRIMARY KEY (lang, key)) WITHOUT ROWID''')
+                conn.execute('''CREATE TABLE IF NOT EXISTS translation_meta
+                                (name TEXT PRIMARY KEY, value TEXT)''')
+            import_translation_json(conn)
+            _translation_store_ready.add(os.getpid())
+    return conn
+
+def import_translation_json(conn, json_path=TRANSLATION_CACHE_JSON):
+    """One-time import of the legacy translation_cache.json - returns the number of rows added"""
+    if conn.execute("SELECT 1 FROM translation_meta WHERE name = 'json_imported'").fetchone():
+        return 0
+    
+    entries = {}
+    if os.path.exists(json_path):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read {json_path}, skipping import: {e}")
+            return 0
+    
+    # Keys that only differ by spacing or case collapse onto one row
+    rows = {}
+    for source, translation in entries.items():
+        if isinstance(source, str) and isinstance(translation, str) and source.strip() and translation.strip():
+            rows[normalize_translation_key(source)] = (source.strip(), translation.strip())
+    
+    with conn:
+        before = conn.total_changes
+        conn.executemany('''INSERT OR IGNORE INTO translations (lang, key, source, translation)
+                            VALUES (?, ?, ?, ?)''',
+                         [(TRANSLATION_LANGUAGE, key, source, translation) for key, (source, translation) in rows.items()])
+        added = conn.total_changes - before
+        conn.execute("INSERT OR REPLACE INTO translation_meta (name, value) VALUES ('json_imported', ?)",
+                     (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+    if entries:
+        print(f"✅ Imported {added} translations from {json_path}")
+    return added
+
+def _remember_translation(cache_key, translation):
+    """Put a translation in the in-memory LRU; caller holds _translation_lock"""
+    _translation_cache[cache_key] = translation
+    _translation_cache.move_to_end(cache_key)
+    if len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+        _translation_cache.popitem(last=False)
+
+def get_cached_translations(texts, lang=TRANSLATION_LANGUAGE):
+    """Cached translations for several strings - returns {text: translation} for the ones found"""
+    found = {}
+    pending = {}  # normalized key -> source strings
+    with _translation_lock:
+        for text in texts:
+            if not text or not text.strip():
+                continue
+            key = normalize_translation_key(text)
+            translation = _translation_cache.get((lang, key))
+            if translation is not None:
+                _translation_cache.move_to_end((lang, key))
+                _translation_stats['hits'] += 1
+                found[text] = translation
+            else:
+                pending.setdefault(key, []).append(text)
+    if not pending:
+        return found
+    
+    conn = _translation_db()
+    keys = list(pending)
+    rows = []
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        rows += conn.execute(f'''SELECT key, translation FROM translations
+                                 WHERE lang = ? AND key IN ({', '.join('?' * len(chunk))})''',
+                             [lang] + chunk).fetchall()
+    
+    with _translation_lock:
+        _translation_stats['db_hits'] += len(rows)
+        _translation_stats['misses'] += len(keys) - len(rows)
+        for key, translation in rows:
+            _remember_translation((lang, key), translation)
+            for text in pending[key]:
+                found[text] = translation
+    return found
+
+def get_cached_translation(text, lang=TRANSLATION_LANGUAGE):
+    """Cached translation of one string, or None"""
+    return get_cached_translations([text], lang).get(text)
+
+def store_translations(pairs, lang=TRANSLATION_LANGUAGE):
+    """Save (source, translation) pairs in one transaction and refresh the LRU"""
+    rows = {}
+    for source, translation in pairs:
+        if source and source.strip() and translation and translation.strip():
+            rows[normalize_translation_key(source)] = (source.strip(), translation.strip())
+    if not rows:
+        return 0
+    
+    conn = _translation_db()
+    with conn:
+        conn.executemany('''INSERT INTO translations (lang, key, source, translation) VALUES (?, ?, ?, ?)
+                            ON CONFLICT (lang, key) DO UPDATE SET
+                                translation = excluded.translation, updated_at = CURRENT_TIMESTAMP''',
+                         [(lang, key, source, translation) for key, (source, translation) in rows.items()])
+    with _translation_lock:
+        for key, (source, translation) in rows.items():
+            _remember_translation((lang, key), translation)
+    return len(rows)
+
+def store_translation(source, translation, lang=TRANSLATION_LANGUAGE):
+    """Save one translation"""
+    return store_translations([(source, translation)], lang)
+
+def translation_cache_info():
+    """Hit/miss counters for the translation LRU"""
+    with _translation_lock:
+        return dict(_translation_stats, size=len(_translation_cache), max_size=TRANSLATION_CACHE_SIZE)
+
+# Translation pipeline - text is split into sentences, cache hits are reused and only the
+# distinct misses go to the backend, batched across a small thread pool
+app.config['TRANSLATION_BACKEND'] = os.environ.get('TRANSLATION_BACKEND', 'local')
+app.config['TRANSLATION_API_URL'] = os.environ.get('TRANSLATION_API_URL', '')
+app.config['TRANSLATION_BATCH_SIZE'] = 32
+app.config['TRANSLATION_WORKERS'] = 4
+app.config['TRANSLATION_TIMEOUT_SECONDS'] = 10
+
+# Sentence ends and line breaks; the capture group keeps separators for reassembly
+SENTENCE_SPLIT_RE = re.compile(r'(\s*\n\s*|(?<=[.!?;:])\s+)')
+
+TRANSLATION_BACKENDS = {}  # name -> (translate(texts, lang, timeout), cacheable)
+
+_translation_pool = None
+_translation_pool_lock = threading.Lock()
+
+def register_translation_backend(name, cacheable=True):
+    """Register a batch translator - it takes a list of strings and returns them translated, in order"""
+    def decorator(func):
+        TRANSLATION_BACKENDS[name] = (func, cacheable)
+        return func
+    return decorator
+
+@register_translation_backend('local', cacheable=False)
+def local_translation_backend(texts, lang, timeout):
+    """Offline stand-in - returns the English text unchanged, so results are never cached"""
+    return list(texts)
+
+@register_translation_backend('http')
+def http_translation_backend(texts, lang, timeout):
+    """POST a batch to TRANSLATION_API_URL as {'q': [...], 'target': lang} and read back {'translations': [...]}"""
+    response = requests.post(app.config['TRANSLATION_API_URL'], json={'q': texts, 'target': lang}, timeout=timeout)
+    response.raise_for_status()
+    return response.json()['translations']
+
+def get_translation_pool():
+    """Create the translation thread pool on first use"""
+    global _translation_pool
+    with _translation_pool_lock:
+        if _translation_pool is None:
+            _translation_pool = ThreadPoolExecutor(max_workers=app.config['TRANSLATION_WORKERS'],
+                                                   thread_name_prefix='translate')
+        return _translation_pool
+
+def split_sentences(text):
+    """Split text into sentences and the separators between them - ''.join() gives the text back"""
+    return SENTENCE_SPLIT_RE.split(text)
+
+def translate_sentences(sentences, lang=TRANSLATION_LANGUAGE):
+    """Translate distinct sentences through the cache and the configured backend - returns {sentence: translation}"""
+    sentences = [s for s in dict.fromkeys(sentences) if s and s.strip()]
+    translated = get_cached_translations(sentences, lang)
+    
+    # One backend request per distinct normalized sentence
+    misses = {}
+    for sentence in sentences:
+        if sentence not in translated:
+            misses.setdefault(normalize_translation_key(sentence), sentence)
+    if not misses:
+        return translated
+    
+    backend, cacheable = TRANSLATION_BACKENDS[app.config['TRANSLATION_BACKEND']]
+    timeout = app.config['TRANSLATION_TIMEOUT_SECONDS']
+    batch_size = app.config['TRANSLATION_BATCH_SIZE']
+    sources = list(misses.values())
+    batches = [sources[i:i + batch_size] for i in range(0, len(sources), batch_size)]
+    
+    pool = get_translation_pool()
+    futures = {pool.submit(backend, batch, lang, timeout): batch for batch in batches}
+    done, not_done = wait(futures, timeout=timeout)
+    for future in not_done:
+        future.cancel()
+        print(f"⚠️ Translation batch of {len(futures[future])} timed out after {timeout}s")
+    
+    results = {}
+    for future in done:
+        batch = futures[future]
+        try:
+            output = future.result()
+            if len(output) != len(batch):
+                raise ValueError(f"backend returned {len(output)} translations for {len(batch)} sentences")
+        except Exception as e:
+            print(f"⚠️ Translation batch failed: {e}")
+            continue
+        for source, translation in zip(batch, output):
+            if translation and translation.strip():
+                results[normalize_translation_key(source)] = translation
+    
+    if cacheable and results:
+        store_translations([(misses[key], translation) for key, translation in results.items()], lang)
+    
+    # Whatever failed or timed out stays in English
+    for sentence in sentences:
+        if sentence not in translated:
+            translated[sentence] = results.get(normalize_translation_key(sentence), sentence)
+    return translated
+
+def translate_texts(texts, lang=TRANSLATION_LANGUAGE):
+    """Translate several texts sentence by sentence in a single pipeline pass"""
+    pieces = [split_sentences(text or '') for text in texts]
+    # Odd indexes are separators
+    translated = translate_sentences([p for parts in pieces for p in parts[::2]], lang)
+    
+    output = []
+    for parts in pieces:
+        output.append(''.join(
+            part if i % 2 or not part.strip() else translated.get(part, part)
+            for i, part in enumerate(parts)
+        ))
+    return output
+
+def translate_text(text, lang=TRANSLATION_LANGUAGE):
+    """Translate one text"""
+    return translate_texts([text], lang)[0]
+
+# Consent template registry - templates are read once and re-read only when they change
+TEMPLATE_RECHECK_SECONDS = 5
+
+_template_registry = {
+    'entries': {},      # filename -> template entry
+    'checked_at': None
+}
+_template_lock = threading.Lock()
+
+def _load_template_entry(template_path, filename, stat):
+    """Read one template file into a registry entry"""
+    display_name = filename.replace('.txt', '').replace('_', ' ').title()
+    try:
+        with open(template_path, 'r', encoding='utf-8') as f:
+            template_content = f.read().strip()
+    except Exception as e:
+        print(f"Error reading template {filename}: {e}")
+        template_content = f"Template for {display_name}"
+    
+    return {
+        'display_name': display_name,
+        'template_content': template_content,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'etag': hashlib.sha256(template_content.encode('utf-8')).hexdigest()[:32],
+        'body_digest': consent_body_digest(template_content),
+        'last_modified': datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+    }
+
+def refresh_template_registry(force=False):
+    """Pick up added, changed and removed templates - unchanged files are not re-read"""
+    checked_at = _template_registry['checked_at']
+    if not force and checked_at is not None and time.monotonic() - checked_at < TEMPLATE_RECHECK_SECONDS:
+        return _template_registry['entries']
+    
+    with _template_lock:
+        forms_folder = app.config['UPLOAD_FOLDER']
+        if not os.path.exists(forms_folder):
+            os.makedirs(forms_folder)
+            # Create sample template files if none exist
+            create_sample_templates(forms_folder)
+        
+        # Build a new mapping and swap it in - readers iterate the old one without the lock
+        previous = _template_registry['entries']
+        entries = {}
+        for filename in os.listdir(forms_folder):
+            if not filename.lower().endswith('.txt'):
+                continue
             template_path = os.path.join(forms_folder, filename)
             try:
-                with open(template_path, 'r', encoding='utf-8') as f:
-                    template_content = f.read().strip()
-            except Exception as e:
-                print(f"Error reading template {filename}: {e}")
-                template_content = f"Template for {display_name}"
+                stat = os.stat(template_path)
+            except OSError:
+                continue
+            entry = previous.get(filename)
+            if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                entry = _load_template_entry(template_path, filename, stat)
+            entries[filename] = entry
+        
+        _template_registry['entries'] = entries
+        _template_registry['checked_at'] = time.monotonic()
+        return entries
+
+def get_consent_types():
+    """Get available consent types from the template registry"""
+    return dict(refresh_template_registry())
+
+# Translation warmup - every sentence of the static template catalog is translated ahead of
+# time so counsellor sessions only ever hit the cache
+app.config['TRANSLATION_WARMUP'] = os.environ.get('TRANSLATION_WARMUP', '1') == '1'
+
+def catalog_sentences():
+    """Distinct sentences across the consent templates and consent_system.db types"""
+    texts = [entry['template_content'] for entry in refresh_template_registry().values()]
+    try:
+        conn = get_db('consent_system')
+        for name, description in conn.execute('SELECT DISTINCT name, description FROM consent_types'):
+            texts += [name or '', description or '']
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not read consent types for warmup: {e}")
+    
+    sentences = {}
+    for text in texts:
+        for sentence in split_sentences(text)[::2]:
+            if sentence.strip():
+                sentences.setdefault(normalize_translation_key(sentence), sentence)
+    return list(sentences.values())
+
+def translation_coverage(sentences, lang=TRANSLATION_LANGUAGE):
+    """How many of the given sentences already have a cached translation"""
+    cached = get_cached_translations(sentences, lang)
+    return {'sentences': len(sentences), 'cached': len(cached),
+            'coverage': len(cached) / len(sentences) if sentences else 1.0}
+
+def translation_backend_cacheable(name=None):
+    """Whether a backend's translations are kept in the cache - warmup is pointless otherwise"""
+    return TRANSLATION_BACKENDS[name or app.config['TRANSLATION_BACKEND']][1]
+
+def warm_translation_cache(lang=TRANSLATION_LANGUAGE, dry_run=False):
+    """Translate every uncached catalog sentence - returns coverage before and after.
+    With a backend whose output isn't cached this only reports coverage"""
+    dry_run = dry_run or not translation_backend_cacheable()
+    started = time.monotonic()
+    sentences = catalog_sentences()
+    cached = get_cached_translations(sentences, lang)
+    missing = [s for s in sentences if s not in cached]
+    
+    if missing and not dry_run:
+        batch = app.config['TRANSLATION_BATCH_SIZE'] * app.config['TRANSLATION_WORKERS']
+        for start in range(0, len(missing), batch):
+            translate_sentences(missing[start:start + batch], lang)
+    
+    after = translation_coverage(sentences, lang)
+    after['before'] = len(cached) / len(sentences) if sentences else 1.0
+    after['seconds'] = time.monotonic() - started
+    return after
+
+def start_translation_warmup():
+    """Warm the translation cache in the background so startup never waits on the backend"""
+    if not translation_backend_cacheable():
+        print(f"ℹ️ Translation warmup skipped: the '{app.config['TRANSLATION_BACKEND']}' backend's output is not cached")
+        return None
+    
+    def run():
+        try:
+            report = warm_translation_cache()
+            print(f"✅ Translation warmup: {report['cached']}/{report['sentences']} catalog sentences cached "
+                  f"({report['coverage']:.0%}, was {report['before']:.0%}) in {report['seconds']:.1f}s")
+        except Exception as e:
+            print(f"⚠️ Translation warmup failed: {e}")
+    
+    thread = threading.Thread(target=run, name='translation-warmup', daemon=True)
+    thread.start()
+    return thread
+
+_translation_warmup_started = set()  # pids that have started their warmup
+_translation_warmup_lock = threading.Lock()
+
+@app.before_request
+def ensure_translation_warmup():
+    """Start the warmup once per process, on boot or the first request - WSGI servers never run __main__"""
+    if not app.config['TRANSLATION_WARMUP'] or os.getpid() in _translation_warmup_started:
+        return
+    with _translation_warmup_lock:
+        if os.getpid() not in _translation_warmup_started:
+            _translation_warmup_started.add(os.getpid())
+            start_translation_warmup()
+
+# Consent type typeahead - sorted prefix index over consent_system.db, rebuilt when the catalog changes
+CATALOG_RECHECK_SECONDS = 5
+TYPEAHEAD_LIMIT = 10
+
+_catalog_index = {
+    'signature': None,
+    'checked_at': None,
+    'types': {},        # id -> {'id', 'name', 'description', 'template_file'}
+    'tokens': [],       # sorted (token, id) pairs
+    'names': [],        # sorted (lowercased full name, id) pairs
+    'name_tokens': {}   # id -> words of the name, for ranking
+}
+_catalog_lock = threading.Lock()
+
+def _tokenize(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+def _catalog_file_signature():
+    """mtime/size of the catalog database and its WAL, used to detect edits"""
+    signature = []
+    for path in (DATABASES['consent_system'], DATABASES['consent_system'] + '-wal'):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def refresh_catalog_index(force=False):
+    """Rebuild the typeahead index if consent_types changed"""
+    checked_at = _catalog_index['checked_at']
+    if not force and checked_at is not None and time.monotonic() - checked_at < CATALOG_RECHECK_SECONDS:
+        return _catalog_index
+    
+    with _catalog_lock:
+        signature = _catalog_file_signature()
+        if force or signature != _catalog_index['signature']:
+            conn = get_db('consent_system')
+            rows = conn.execute('SELECT id, name, description, template_file FROM consent_types').fetchall()
             
-            consent_types[filename] = {
-                'display_name': display_name,
-                'template_content': template_content
-            }
-    
-    return consent_types
+            types = {}
+            tokens = []
+            names = []
+            name_tokens = {}
+            for type_id, name, description, template_file in rows:
+                types[type_id] = {'id': type_id, 'name': name, 'description': description, 'template_file': template_file}
+                names.append(((name or '').lower(), type_id))
+                name_tokens[type_id] = _tokenize(name)
+                for token in set(_tokenize(name) + _tokenize(description)):
+                    tokens.append((token, type_id))
+            
+            _catalog_index['types'] = types
+            _catalog_index['tokens'] = sorted(tokens)
+            _catalog_index['names'] = sorted(names)
+            _catalog_index['name_tokens'] = name_tokens
+            _catalog_index['signature'] = signature
+        _catalog_index['checked_at'] = time.monotonic()
+        return _catalog_index
+
+def _prefix_ids(sorted_pairs, prefix):
+    """Ids whose key starts with prefix - a bisect range over a sorted array"""
+    start = bisect.bisect_left(sorted_pairs, (prefix,))
+    end = bisect.bisect_left(sorted_pairs, (prefix + '\uffff',))
+    return {type_id for _, type_id in sorted_pairs[start:end]}
+
+def search_consent_types(query, limit=TYPEAHEAD_LIMIT):
+    """Consent types matching every word of the query as a prefix, best matches first"""
+    index = refresh_catalog_index()
+    words = _tokenize(query)
+    if not words or limit < 1:
+        return []
+    
+    matches = None
+    for word in words:
+        ids = _prefix_ids(index['tokens'], word)
+        matches = ids if matches is None else matches & ids
+        if not matches:
+            return []
+    
+    # Names that start with the whole query rank first, then names containing the words
+    name_prefix = _prefix_ids(index['names'], ' '.join(words))
+    types = index['types']
+    name_tokens = index['name_tokens']
+    ranked = sorted(matches, key=lambda type_id: (
+        type_id not in name_prefix,
+        not all(any(token.startswith(word) for token in name_tokens[type_id]) for word in words),
+        types[type_id]['name'] or '',
+        type_id
+    ))
+    
+    # The catalog repeats some forms - show each name once
+    results = []
+    seen_names = set()
+    for type_id in ranked:
+        name = types[type_id]['name']
+        if name in seen_names:
+            continue
+        seen_names.add(name)
+        results.append(types[type_id])
+        if len(results) >= limit:
+            break
+    return results
 
 def create_sample_templates(forms_folder):
     """Create sample consent template files if none exist"""
@@ -471,45 +1657,86 @@ Acknowledgements:
             f.write(content)
         print(f"✅ Created sample template: {filename}")
 
-def add_header_to_new_page(can, width, height):
-    """Add header to new pages"""
-    header_height = height - 50
-    
-    # Hospital Information - Perfectly Centered
-    can.setFillColorRGB(0.545, 0, 0)  # Dark Red color #8B0000
-    
-    college_text = "MES MEDICAL COLLEGE"
-    location_text = "PERINTHALMANNA"
-    consent_text = "DIGITAL CONSENT FORM"
-    
-    can.setFont("Helvetica-Bold", 18)
-    text_width = can.stringWidth(college_text, "Helvetica-Bold", 18)
-    college_x = (width - text_width) / 2
-    can.drawString(college_x, header_height - 30, college_text)
-    
-    can.setFont("Helvetica-Bold", 14)
-    text_width = can.stringWidth(location_text, "Helvetica-Bold", 14)
-    location_x = (width - text_width) / 2
-    can.drawString(location_x, header_height - 55, location_text)
-    
-    can.setFillColorRGB(0, 0, 0)  # Black color for rest of text
-    can.setFont("Helvetica-Bold", 16)
-    text_width = can.stringWidth(consent_text, "Helvetica-Bold", 16)
-    consent_x = (width - text_width) / 2
-    can.drawString(consent_x, header_height - 80, consent_text)
-    
-    # Draw a thick red line under header
-    can.setStrokeColorRGB(0.545, 0, 0)  # Dark Red
-    can.setLineWidth(2)
-    can.line(50, header_height - 100, width - 50, header_height - 100)
-    can.setStrokeColorRGB(0, 0, 0)  # Reset to black
-
-def load_logo_image():
-    """Load logo image with multiple fallback options - IMPROVED VERSION"""
-    # Try multiple logo files with proper path handling
-    logo_files = ['mes-logo.jpg', 'mes-logo.png', 'mes-logo-no-bgm.jpg', 'mes-logo-animated.jpg']
-    
-    for logo_file in logo_files:
+# PDF output profile - compressed binary page streams and images embedded at print resolution
+app.config['PDF_PAGE_COMPRESSION'] = 1
+app.config['PDF_IMAGE_DPI'] = 300
+app.config['PDF_JPEG_QUALITY'] = 85
+app.config['PDF_ASCII85'] = False  # ASCII85 armour only adds a quarter to every stream
+
+# ReportLab reads useA85 from rl_config when images are drawn and when the document is
+# written - profile canvases override it for just those calls, other canvases keep the default
+_ascii85_override = {'depth': 0, 'saved': None}
+_ascii85_lock = threading.Lock()
+
+@contextmanager
+def _profile_ascii85(enabled):
+    with _ascii85_lock:
+        if _ascii85_override['depth'] == 0:
+            _ascii85_override['saved'] = rl_config.useA85
+            rl_config.useA85 = int(enabled)
+        _ascii85_override['depth'] += 1
+    try:
+        yield
+    finally:
+        with _ascii85_lock:
+            _ascii85_override['depth'] -= 1
+            if _ascii85_override['depth'] == 0:
+                rl_config.useA85 = _ascii85_override['saved']
+
+class ProfileCanvas(canvas.Canvas):
+    """Canvas that writes its streams with the profile's ASCII85 setting"""
+    
+    def __init__(self, *args, ascii85=False, **kwargs):
+        self._profile_ascii85 = ascii85
+        super().__init__(*args, **kwargs)
+    
+    def drawImage(self, *args, **kwargs):
+        with _profile_ascii85(self._profile_ascii85):
+            return super().drawImage(*args, **kwargs)
+    
+    def save(self):
+        with _profile_ascii85(self._profile_ascii85):
+            return super().save()
+
+def new_pdf_canvas(packet, pagesize=A4):
+    """Canvas configured with the PDF output profile"""
+    return ProfileCanvas(packet, pagesize=pagesize, pageCompression=app.config['PDF_PAGE_COMPRESSION'],
+                         ascii85=app.config['PDF_ASCII85'])
+
+def compact_image_bytes(image_bytes, box_points):
+    """Re-encode an image for a box of the given size in points - keeps the original if that is smaller"""
+    image = Image.open(io.BytesIO(image_bytes))
+    dpi = app.config['PDF_IMAGE_DPI']
+    max_size = tuple(max(1, int(round(points / 72 * dpi))) for points in box_points)
+    
+    resized = image.copy()
+    resized.thumbnail(max_size, Image.LANCZOS)
+    output = io.BytesIO()
+    if resized.mode in ('RGBA', 'LA', 'P') or 'transparency' in resized.info:
+        resized.save(output, format='PNG', optimize=True)
+    else:
+        resized.convert('L' if resized.mode in ('1', 'L') else 'RGB').save(
+            output, format='JPEG', quality=app.config['PDF_JPEG_QUALITY'], optimize=True)
+    
+    compacted = output.getvalue()
+    return compacted if len(compacted) < len(image_bytes) else image_bytes
+
+# Letterhead logo cache - resolved once, re-checked only when the file changes
+LOGO_BOX_POINTS = (70, 70)
+LOGO_FILES = ['mes-logo.jpg', 'mes-logo.png', 'mes-logo-no-bgm.jpg', 'mes-logo-animated.jpg']
+LOGO_RECHECK_SECONDS = 60
+
+_logo_cache = {
+    'path': None,
+    'mtime': None,
+    'image': None,
+    'checked_at': None
+}
+_logo_lock = threading.Lock()
+
+def _resolve_logo_path():
+    """Find the first valid logo image on disk"""
+    for logo_file in LOGO_FILES:
         # Try multiple possible locations
         possible_paths = [
             os.path.join(app.config['STATIC_FOLDER'], logo_file),
@@ -523,58 +1750,85 @@ def load_logo_image():
         for logo_path in possible_paths:
             if os.path.exists(logo_path):
                 try:
-                    print(f"✅ Found logo at: {logo_path}")
                     # Check if file is actually an image by reading first few bytes
                     with open(logo_path, 'rb') as f:
                         header = f.read(8)
                         # Check for common image file signatures
                         if header.startswith(b'\xff\xd8\xff') or header.startswith(b'\x89PNG\r\n\x1a\n') or header.startswith(b'GIF8') or header.startswith(b'BM'):
-                            return ImageReader(logo_path)
+                            print(f"✅ Found logo at: {logo_path}")
+                            return logo_path
                         else:
                             print(f"⚠️ File {logo_path} is not a valid image file")
                             continue
                 except Exception as e:
                     print(f"❌ Error loading logo from {logo_path}: {e}")
                     continue
-    
-    print("❌ No valid logo image found in any location")
     return None
 
-def create_complete_consent_pdf(patient_info, patient_signature_data, relative_signature_data, nurse_signature_data, doctor_signature_data, consent_id, nurse_signed_by=None, doctor_signed_by=None):
-    """Create a complete PDF consent form with header, content, and ALL signatures"""
-    packet = io.BytesIO()
-    
-    # Use A4 size for better layout
-    can = canvas.Canvas(packet, pagesize=A4)
-    width, height = A4
-    
-    # Improved font registration
-    malayalam_available = setup_fonts()
-    
-    # Header Section - Centered MES Medical College Header
+def load_logo_image():
+    """Return the cached logo ImageReader, reloading only when the file changes"""
+    checked_at = _logo_cache['checked_at']
+    if checked_at is not None and time.monotonic() - checked_at < LOGO_RECHECK_SECONDS:
+        return _logo_cache['image']
+    
+    with _logo_lock:
+        checked_at = _logo_cache['checked_at']
+        if checked_at is not None and time.monotonic() - checked_at < LOGO_RECHECK_SECONDS:
+            return _logo_cache['image']
+        
+        # Cheap mtime check on the already resolved logo
+        path = _logo_cache['path']
+        if path:
+            try:
+                if os.stat(path).st_mtime_ns == _logo_cache['mtime']:
+                    _logo_cache['checked_at'] = time.monotonic()
+                    return _logo_cache['image']
+            except OSError:
+                pass
+        
+        image = None
+        mtime = None
+        path = _resolve_logo_path()
+        if path:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                with open(path, 'rb') as f:
+                    logo_bytes = f.read()
+                # Shrink to print size and decode once; the same reader is handed to every canvas
+                image = ImageReader(io.BytesIO(compact_image_bytes(logo_bytes, LOGO_BOX_POINTS)))
+                image.getRGBData()
+            except Exception as e:
+                print(f"❌ Error loading logo from {path}: {e}")
+                image = None
+        else:
+            print("❌ No valid logo image found in any location")
+        
+        _logo_cache['path'] = path if image else None
+        _logo_cache['mtime'] = mtime
+        _logo_cache['image'] = image
+        _logo_cache['checked_at'] = time.monotonic()
+        return image
+
+# Letterhead - compiled once per document into a form XObject and stamped on every page
+LETTERHEAD_FORM = 'MESLetterhead'
+
+def draw_letterhead(can, width, height):
+    """Draw the hospital letterhead - logo, college name, location, title and red rule"""
     header_height = height - 50
     
-    # Load logo with improved error handling
+    # Logo comes from the in-memory asset cache
     logo_image = load_logo_image()
     
     if logo_image:
         try:
             # Position logo on left with proper spacing
-            can.drawImage(logo_image, 50, header_height - 80, width=70, height=70, preserveAspectRatio=True, mask='auto')
-            print("✅ Logo successfully added to PDF")
+            can.drawImage(logo_image, 50, header_height - 80, width=LOGO_BOX_POINTS[0], height=LOGO_BOX_POINTS[1], preserveAspectRatio=True, mask='auto')
         except Exception as e:
             print(f"❌ Error drawing logo: {e}")
-            # Fallback to text logo
-            can.setFillColorRGB(0.545, 0, 0)  # Dark Red
-            can.rect(50, header_height - 80, 70, 70, fill=1)
-            can.setFillColorRGB(1, 1, 1)  # White text
-            can.setFont("Helvetica-Bold", 10)
-            can.drawString(55, header_height - 45, "MES")
-            can.drawString(55, header_height - 60, "MEDICAL")
-            can.setFillColorRGB(0, 0, 0)  # Reset to black
-    else:
-        # Create text-based header as fallback
-        print("⚠️ Using text-based header (no logo available)")
+            logo_image = None
+    
+    if not logo_image:
+        # Text-based logo as fallback
         can.setFillColorRGB(0.545, 0, 0)  # Dark Red
         can.rect(50, header_height - 80, 70, 70, fill=1)
         can.setFillColorRGB(1, 1, 1)  # White text
@@ -611,18 +1865,183 @@ def create_complete_consent_pdf(patient_info, patient_signature_data, relative_s
     can.setLineWidth(2)
     can.line(50, header_height - 100, width - 50, header_height - 100)
     can.setStrokeColorRGB(0, 0, 0)  # Reset to black
+
+def compile_letterhead(can, width, height):
+    """Compile the letterhead into a form XObject - must run before anything is drawn"""
+    can.beginForm(LETTERHEAD_FORM)
+    draw_letterhead(can, width, height)
+    can.endForm()
+
+def add_header_to_new_page(can, width, height):
+    """Stamp the compiled letterhead on the current page"""
+    can.doForm(LETTERHEAD_FORM)
+
+# Decoded-signature cache - shared by every render stage and regeneration job in this process
+SIGNATURE_CACHE_SIZE = 256
+
+_signature_cache = OrderedDict()  # sha256 -> (ImageReader, width, height)
+_signature_cache_lock = threading.Lock()
+_signature_cache_stats = {'hits': 0, 'misses': 0}
+
+def get_signature_image(signature_blob):
+    """Decoded signature and its size scaled into the 120x50 box, from a bounded LRU"""
+    # The blob store already keys signatures by content hash, so a hit never touches the PNG
+    key, signature_png = signature_blob
+    with _signature_cache_lock:
+        entry = _signature_cache.get(key)
+        if entry is not None:
+            _signature_cache.move_to_end(key)
+            _signature_cache_stats['hits'] += 1
+            return entry
+        _signature_cache_stats['misses'] += 1
+    
+    signature_image = ImageReader(io.BytesIO(signature_png))
+    
+    img_width, img_height = signature_image.getSize()
+    max_width, max_height = SIGNATURE_BOX_POINTS
+    width_ratio = max_width / img_width
+    height_ratio = max_height / img_height
+    scale_factor = min(width_ratio, height_ratio)
+    entry = (signature_image, img_width * scale_factor, img_height * scale_factor)
+    
+    with _signature_cache_lock:
+        _signature_cache[key] = entry
+        if len(_signature_cache) > SIGNATURE_CACHE_SIZE:
+            _signature_cache.popitem(last=False)
+    return entry
+
+def signature_cache_info():
+    """Hit/miss counters for the decoded-signature cache"""
+    with _signature_cache_lock:
+        return dict(_signature_cache_stats, size=len(_signature_cache), max_size=SIGNATURE_CACHE_SIZE)
+
+def draw_signature_image(can, signature_blob, x, signature_y, role):
+    """Draw a (hash, png) signature blob scaled into its 120x50 box - returns False if nothing was drawn"""
+    if not signature_blob:
+        return False
+    try:
+        signature_image, new_width, new_height = get_signature_image(signature_blob)
+        can.drawImage(signature_image, x, signature_y - 60, width=new_width, height=new_height, preserveAspectRatio=True, mask='auto')
+        return True
+    except Exception as e:
+        print(f"{role.title()} signature error: {e}")
+        return False
+
+def draw_staff_signature(can, role, x, signature_y, signature_blob, signed_by, doctor_name=None, signed_at=None):
+    """Draw the nurse or doctor signature block below its heading"""
+    if not draw_signature_image(can, signature_blob, x, signature_y, role):
+        can.setLineWidth(1)
+        can.line(x, signature_y - 40, x + 120, signature_y - 40)
+        if not signature_blob:
+            can.setFont("Helvetica", 10)
+            if role == 'doctor':
+                can.drawString(x, signature_y - 60, f"Dr. {doctor_name or 'Signature Pending'}")
+            else:
+                can.drawString(x, signature_y - 60, "Signature Pending")
+    
+    # Signature details
+    can.setFont("Helvetica", 8)
+    if signed_by:
+        title = "Dr." if role == 'doctor' else "Nurse"
+        signed_at = signed_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        can.drawString(x, signature_y - 75, f"Signed by: {title} {signed_by}")
+        can.drawString(x, signature_y - 90, f"Signed at: {signed_at}")
+    else:
+        can.drawString(x, signature_y - 75, "Signed by: Pending")
+        can.drawString(x, signature_y - 90, "Signed at: Pending")
+
+# Nurse and doctor blocks share a row; x offsets match create_complete_consent_pdf
+STAFF_SIGNATURE_X = {'nurse': 50, 'doctor': 200}
+
+def staff_signature_form_name(role):
+    """Name of the form XObject holding a staff signature block"""
+    return f"Staff{role.title()}"
+
+def draw_staff_signature_form(can, role, signature_y, signature_blob, signed_by, doctor_name=None, signed_at=None):
+    """Draw a staff signature block as its own form XObject, so stamping can swap the whole block"""
+    form_name = staff_signature_form_name(role)
+    can.beginForm(form_name)
+    draw_staff_signature(can, role, STAFF_SIGNATURE_X[role], signature_y, signature_blob, signed_by, doctor_name, signed_at)
+    can.endForm()
+    can.doForm(form_name)
+
+def _find_xobject_owner(resources, xobject_name):
+    """XObject dictionary that holds xobject_name, searching nested forms"""
+    xobjects = resources.get('/XObject')
+    if xobjects is None:
+        return None
+    xobjects = xobjects.get_object()
+    if xobject_name in xobjects:
+        return xobjects
+    for xobject in xobjects.values():
+        xobject = xobject.get_object()
+        if xobject.get('/Subtype') == '/Form' and '/Resources' in xobject:
+            owner = _find_xobject_owner(xobject['/Resources'].get_object(), xobject_name)
+            if owner is not None:
+                return owner
+    return None
+
+def write_pdf_atomically(pdf_path, pdf_bytes):
+    """Write PDF bytes via a temp file so readers never see a half-written consent - returns the size"""
+    os.makedirs(os.path.dirname(pdf_path) or '.', exist_ok=True)
+    temp_path = f"{pdf_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as output_file:
+        output_file.write(pdf_bytes)
+    os.replace(temp_path, pdf_path)
+    return len(pdf_bytes)
+
+def stamp_staff_signature(pdf_path, layout, role, signature_blob, signed_by, doctor_name=None, signed_at=None):
+    """Replace the "Pending" nurse/doctor block of a generated consent PDF - returns the new PDF bytes,
+    or None if the PDF has no replaceable block"""
+    reader = PdfReader(pdf_path)
+    page_index = layout['page']
+    if page_index >= len(reader.pages):
+        return None
+    
+    target_page = reader.pages[page_index]
+    page_width = float(target_page.mediabox.width)
+    page_height = float(target_page.mediabox.height)
+    
+    # Draw the signed block as a form of the same name as the placeholder
+    packet = io.BytesIO()
+    can = new_pdf_canvas(packet, pagesize=(page_width, page_height))
+    draw_staff_signature_form(can, role, layout['staff_signature_y'], signature_blob, signed_by, doctor_name, signed_at)
+    can.save()
+    packet.seek(0)
+    
+    xobject_name = f"/{pdfdoc.xObjectName(staff_signature_form_name(role))}"
+    signed_form = PdfReader(packet).pages[0]['/Resources']['/XObject'][xobject_name]
+    
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    
+    # The placeholder's text goes with its form - nothing is left under the signature
+    owner = _find_xobject_owner(writer.pages[page_index]['/Resources'].get_object(), xobject_name)
+    if owner is None:
+        return None
+    owner[NameObject(xobject_name)] = signed_form.get_object().clone(writer, force_duplicate=True).indirect_reference
+    
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+def draw_consent_body(can, procedure_content, place_fields):
+    """Draw the patient-independent part of a consent - place_fields(can, section, y) is called
+    wherever per-consent details go, on the page they belong to"""
+    width, height = A4
+    
+    # Letterhead is compiled once and stamped on every page
+    compile_letterhead(can, width, height)
+    add_header_to_new_page(can, width, height)
+    header_height = height - 50
     
     # Patient Information Section
     y_position = header_height - 130
     
     can.setFont("Helvetica-Bold", 12)
     can.drawString(50, y_position, "PATIENT DETAILS:")
-    can.setFont("Helvetica", 11)
-    can.drawString(50, y_position - 20, f"Name: {patient_info['name']}")
-    can.drawString(50, y_position - 40, f"Age: {patient_info['age']}")
-    can.drawString(50, y_position - 60, f"MRN: {patient_info['mrn']}")
-    can.drawString(300, y_position - 20, f"Doctor: {patient_info.get('doctor', 'Not assigned')}")
-    can.drawString(300, y_position - 60, f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    place_fields(can, 'details', y_position)
     
     y_position -= 90
     
@@ -631,9 +2050,7 @@ def create_complete_consent_pdf(patient_info, patient_signature_data, relative_s
     can.drawString(50, y_position, "CONSENT REQUIRED FOR:")
     y_position -= 25
     
-    can.setFont("Helvetica", 12)
-    consent_english = clean_text_for_pdf(patient_info.get('consent_required_for', 'Not specified'))
-    can.drawString(50, y_position, consent_english)
+    place_fields(can, 'consent_required_for', y_position)
     y_position -= 25
     
     # Procedure/Reason Details Section - IMPROVED MALAYALAM HANDLING
@@ -642,7 +2059,6 @@ def create_complete_consent_pdf(patient_info, patient_signature_data, relative_s
     y_position -= 25
     
     # Procedure Details with proper wrapping - IMPROVED MALAYALAM HANDLING
-    procedure_content = patient_info.get('procedure_details', '')
     if procedure_content:
         # Detect if content contains Malayalam characters
         malayalam_chars = re.findall(r'[\u0D00-\u0D7F]', procedure_content)
@@ -695,75 +2111,11 @@ def create_complete_consent_pdf(patient_info, patient_signature_data, relative_s
     can.drawString(50, y_position, "SIGNATURES:")
     y_position -= 40
     
-    # Patient Signature
     can.setFont("Helvetica-Bold", 12)
     can.drawString(50, y_position, "Patient Signature:")
-    
-    patient_signature_y = y_position - 20
-    
-    if patient_signature_data and patient_signature_data.startswith('data:image'):
-        try:
-            signature_b64 = patient_signature_data.split(',')[1]
-            signature_bytes = base64.b64decode(signature_b64)
-            temp_img = io.BytesIO(signature_bytes)
-            signature_image = ImageReader(temp_img)
-            
-            img_width, img_height = signature_image.getSize()
-            max_width, max_height = 120, 50
-            width_ratio = max_width / img_width
-            height_ratio = max_height / img_height
-            scale_factor = min(width_ratio, height_ratio)
-            new_width = img_width * scale_factor
-            new_height = img_height * scale_factor
-            
-            can.drawImage(signature_image, 50, patient_signature_y - 60, width=new_width, height=new_height, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Patient signature error: {e}")
-            can.setLineWidth(1)
-            can.line(50, patient_signature_y - 40, 170, patient_signature_y - 40)
-    else:
-        can.setLineWidth(1)
-        can.line(50, patient_signature_y - 40, 170, patient_signature_y - 40)
-    
-    # Patient signature details
-    can.setFont("Helvetica", 8)
-    can.drawString(50, patient_signature_y - 75, f"Patient: {patient_info.get('signatory_name', patient_info['name'])}")
-    can.drawString(50, patient_signature_y - 90, f"Signed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    # Relative Signature
-    can.setFont("Helvetica-Bold", 12)
     can.drawString(200, y_position, "Relative Signature:")
-    
-    relative_signature_y = y_position - 20
-    
-    if relative_signature_data and relative_signature_data.startswith('data:image'):
-        try:
-            signature_b64 = relative_signature_data.split(',')[1]
-            signature_bytes = base64.b64decode(signature_b64)
-            temp_img = io.BytesIO(signature_bytes)
-            signature_image = ImageReader(temp_img)
-            
-            img_width, img_height = signature_image.getSize()
-            max_width, max_height = 120, 50
-            width_ratio = max_width / img_width
-            height_ratio = max_height / img_height
-            scale_factor = min(width_ratio, height_ratio)
-            new_width = img_width * scale_factor
-            new_height = img_height * scale_factor
-            
-            can.drawImage(signature_image, 200, relative_signature_y - 60, width=new_width, height=new_height, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Relative signature error: {e}")
-            can.setLineWidth(1)
-            can.line(200, relative_signature_y - 40, 320, relative_signature_y - 40)
-    else:
-        can.setLineWidth(1)
-        can.line(200, relative_signature_y - 40, 320, relative_signature_y - 40)
-    
-    # Relative signature details
-    can.setFont("Helvetica", 8)
-    can.drawString(200, relative_signature_y - 75, f"Relationship: {patient_info.get('signatory_relation', 'Relative')}")
-    can.drawString(200, relative_signature_y - 90, f"Signed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    place_fields(can, 'signatures', y_position)
+    signature_y = y_position - 20
     
     # New page for nurse and doctor signatures if needed
     if y_position < 200:
@@ -774,90 +2126,16 @@ def create_complete_consent_pdf(patient_info, patient_signature_data, relative_s
         can.drawString(50, y_position, "SIGNATURES (CONTINUED):")
         y_position -= 40
     
-    # Nurse Signature
-    can.setFont("Helvetica-Bold", 12)
-    can.drawString(50, y_position, "Nurse Signature:")
-    
-    nurse_signature_y = y_position - 20
-    
-    if nurse_signature_data and nurse_signature_data.startswith('data:image'):
-        try:
-            signature_b64 = nurse_signature_data.split(',')[1]
-            signature_bytes = base64.b64decode(signature_b64)
-            temp_img = io.BytesIO(signature_bytes)
-            signature_image = ImageReader(temp_img)
-            
-            img_width, img_height = signature_image.getSize()
-            max_width, max_height = 120, 50
-            width_ratio = max_width / img_width
-            height_ratio = max_height / img_height
-            scale_factor = min(width_ratio, height_ratio)
-            new_width = img_width * scale_factor
-            new_height = img_height * scale_factor
-            
-            can.drawImage(signature_image, 50, nurse_signature_y - 60, width=new_width, height=new_height, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Nurse signature error: {e}")
-            can.setLineWidth(1)
-            can.line(50, nurse_signature_y - 40, 170, nurse_signature_y - 40)
-    else:
-        can.setLineWidth(1)
-        can.line(50, nurse_signature_y - 40, 170, nurse_signature_y - 40)
-        can.setFont("Helvetica", 10)
-        can.drawString(50, nurse_signature_y - 60, "Signature Pending")
-    
-    # Nurse signature details
-    can.setFont("Helvetica", 8)
-    if nurse_signed_by:
-        can.drawString(50, nurse_signature_y - 75, f"Signed by: Nurse {nurse_signed_by}")
-        can.drawString(50, nurse_signature_y - 90, f"Signed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    else:
-        can.drawString(50, nurse_signature_y - 75, "Signed by: Pending")
-        can.drawString(50, nurse_signature_y - 90, "Signed at: Pending")
+    # Nurse and doctor signatures share one row
+    staff_signature_y = y_position - 20
     
-    # Doctor Signature
     can.setFont("Helvetica-Bold", 12)
-    can.drawString(200, y_position, "Doctor's Signature:")
-    
-    doctor_signature_y = y_position - 20
-    
-    if doctor_signature_data and doctor_signature_data.startswith('data:image'):
-        try:
-            signature_b64 = doctor_signature_data.split(',')[1]
-            signature_bytes = base64.b64decode(signature_b64)
-            temp_img = io.BytesIO(signature_bytes)
-            signature_image = ImageReader(temp_img)
-            
-            img_width, img_height = signature_image.getSize()
-            max_width, max_height = 120, 50
-            width_ratio = max_width / img_width
-            height_ratio = max_height / img_height
-            scale_factor = min(width_ratio, height_ratio)
-            new_width = img_width * scale_factor
-            new_height = img_height * scale_factor
-            
-            can.drawImage(signature_image, 200, doctor_signature_y - 60, width=new_width, height=new_height, preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Doctor signature error: {e}")
-            can.setLineWidth(1)
-            can.line(200, doctor_signature_y - 40, 320, doctor_signature_y - 40)
-    else:
-        can.setLineWidth(1)
-        can.line(200, doctor_signature_y - 40, 320, doctor_signature_y - 40)
-        can.setFont("Helvetica", 10)
-        can.drawString(200, doctor_signature_y - 60, f"Dr. {patient_info.get('doctor', 'Signature Pending')}")
-    
-    # Doctor signature details
-    can.setFont("Helvetica", 8)
-    if doctor_signed_by:
-        can.drawString(200, doctor_signature_y - 75, f"Signed by: Dr. {doctor_signed_by}")
-        can.drawString(200, doctor_signature_y - 90, f"Signed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    else:
-        can.drawString(200, doctor_signature_y - 75, "Signed by: Pending")
-        can.drawString(200, doctor_signature_y - 90, "Signed at: Pending")
+    can.drawString(STAFF_SIGNATURE_X['nurse'], y_position, "Nurse Signature:")
+    can.drawString(STAFF_SIGNATURE_X['doctor'], y_position, "Doctor's Signature:")
+    place_fields(can, 'staff_signatures', y_position)
     
     # Footer
-    y_position = min(patient_signature_y, relative_signature_y, nurse_signature_y, doctor_signature_y) - 120
+    y_position = min(signature_y, staff_signature_y) - 120
     
     if y_position < 100:
         can.showPage()
@@ -875,11 +2153,459 @@ def create_complete_consent_pdf(patient_info, patient_signature_data, relative_s
     can.setFillColorRGB(0, 0, 0)  # Black
     can.setFont("Helvetica", 8)
     can.drawString(50, y_position - 15, "Digital Consent System - Generated Electronically")
-    
+
+def draw_consent_fields(can, section, y_position, fields):
+    """Draw one section of per-consent details - patient data, dates and signatures"""
+    patient_info = fields['patient_info']
+    
+    if section == 'details':
+        can.setFont("Helvetica", 11)
+        can.drawString(50, y_position - 20, f"Name: {patient_info['name']}")
+        can.drawString(50, y_position - 40, f"Age: {patient_info['age']}")
+        can.drawString(50, y_position - 60, f"MRN: {patient_info['mrn']}")
+        can.drawString(300, y_position - 20, f"Doctor: {patient_info.get('doctor', 'Not assigned')}")
+        can.drawString(300, y_position - 60, f"Date: {fields['signed_at'].strftime('%Y-%m-%d %H:%M')}")
+    
+    elif section == 'consent_required_for':
+        can.setFont("Helvetica", 12)
+        consent_english = clean_text_for_pdf(patient_info.get('consent_required_for', 'Not specified'))
+        can.drawString(50, y_position, consent_english)
+    
+    elif section == 'signatures':
+        # Patient Signature
+        patient_signature_y = y_position - 20
+        
+        if not draw_signature_image(can, fields['patient_signature'], 50, patient_signature_y, 'patient'):
+            can.setLineWidth(1)
+            can.line(50, patient_signature_y - 40, 170, patient_signature_y - 40)
+        
+        # Patient signature details
+        can.setFont("Helvetica", 8)
+        can.drawString(50, patient_signature_y - 75, f"Patient: {patient_info.get('signatory_name', patient_info['name'])}")
+        can.drawString(50, patient_signature_y - 90, f"Signed at: {fields['signed_at'].strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        # Relative Signature
+        relative_signature_y = y_position - 20
+        
+        if not draw_signature_image(can, fields['relative_signature'], 200, relative_signature_y, 'relative'):
+            can.setLineWidth(1)
+            can.line(200, relative_signature_y - 40, 320, relative_signature_y - 40)
+        
+        # Relative signature details
+        can.setFont("Helvetica", 8)
+        can.drawString(200, relative_signature_y - 75, f"Relationship: {patient_info.get('signatory_relation', 'Relative')}")
+        can.drawString(200, relative_signature_y - 90, f"Signed at: {fields['signed_at'].strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    elif section == 'staff_signatures':
+        staff_signature_y = y_position - 20
+        draw_staff_signature_form(can, 'nurse', staff_signature_y, fields['nurse_signature'],
+                                  fields['nurse_signed_by'], signed_at=fields['nurse_signed_at'])
+        draw_staff_signature_form(can, 'doctor', staff_signature_y, fields['doctor_signature'],
+                                  fields['doctor_signed_by'], patient_info.get('doctor'), fields['doctor_signed_at'])
+
+# Compiled templates - the body of an unedited template is rendered once into PDF pages and
+# each consent only draws its own details on a transparent overlay
+app.config['COMPILED_TEMPLATES'] = os.environ.get('COMPILED_TEMPLATES', '1') == '1'
+COMPILED_TEMPLATES_DIR = os.path.join(app.config['GENERATED_FOLDER'], 'compiled_templates')
+
+_compiled_templates = {}  # key -> {'pdf': bytes, 'positions': {section: [page, y]}, 'pages': n}
+_compiled_templates_lock = threading.Lock()
+_compiled_assets = {'fonts': None}  # font file signature as of the last compile
+
+def consent_body_digest(procedure_content):
+    """Digest of procedure text as it will be drawn - equal digests give identical body pages"""
+    return hashlib.sha256(clean_text_for_pdf(procedure_content or '').encode('utf-8')).hexdigest()
+
+def _compiled_template_key(body_digest):
+    """Cache key of a compiled body - changes with the text, the layout version, fonts and logo"""
+    # Fonts are loaded once per process, so their files are only checked when compiling.
+    # The logo reloads when it changes, so the key follows the one load_logo_image() is serving
+    fonts = _compiled_assets['fonts']
+    if fonts is None:
+        fonts = _compiled_assets['fonts'] = list(_font_files_signature(FONTS_DIR))
+    load_logo_image()
+    assets = json.dumps([RENDER_LAYOUT_VERSION, fonts, _logo_cache['path'], _logo_cache['mtime']], default=str)
+    return hashlib.sha256(f"{body_digest}:{assets}".encode('utf-8')).hexdigest()[:32]
+
+def compile_consent_body(procedure_content):
+    """Render the static body pages once and record where each field section goes"""
+    positions = {}
+    
+    def record_position(can, section, y_position):
+        positions[section] = [can.getPageNumber() - 1, y_position]
+    
+    setup_fonts()
+    packet = io.BytesIO()
+    can = new_pdf_canvas(packet)
+    draw_consent_body(can, procedure_content, record_position)
+    pages = can.getPageNumber()
+    can.save()
+    return {'pdf': packet.getvalue(), 'positions': positions, 'pages': pages}
+
+def get_compiled_template(procedure_content):
+    """Compiled body for procedure text that matches a template verbatim, or None for edited text"""
+    if not app.config['COMPILED_TEMPLATES'] or not procedure_content:
+        return None
+    body_digest = consent_body_digest(procedure_content)
+    if not any(entry['body_digest'] == body_digest for entry in refresh_template_registry().values()):
+        return None
+    
+    key = _compiled_template_key(body_digest)
+    compiled = _compiled_templates.get(key)
+    if compiled is not None:
+        return compiled
+    
+    with _compiled_templates_lock:
+        compiled = _compiled_templates.get(key)
+        if compiled is not None:
+            return compiled
+        
+        # Another process may already have compiled it
+        pdf_path = os.path.join(COMPILED_TEMPLATES_DIR, f"{key}.pdf")
+        layout_path = os.path.join(COMPILED_TEMPLATES_DIR, f"{key}.json")
+        try:
+            with open(layout_path, 'r', encoding='utf-8') as f:
+                compiled = json.load(f)
+            with open(pdf_path, 'rb') as f:
+                compiled['pdf'] = f.read()
+        except (OSError, ValueError):
+            compiled = compile_consent_body(procedure_content)
+            write_pdf_atomically(pdf_path, compiled['pdf'])
+            write_pdf_atomically(layout_path, json.dumps({'positions': compiled['positions'], 'pages': compiled['pages']}).encode('utf-8'))
+        
+        # A new key for the same text means the logo changed - the old body is never used again
+        for stale_key in [k for k, v in _compiled_templates.items() if v.get('body_digest') == body_digest]:
+            del _compiled_templates[stale_key]
+        compiled['body_digest'] = body_digest
+        _compiled_templates[key] = compiled
+        return compiled
+
+def compile_consent_templates():
+    """Compile every template body and drop compiled bodies whose template changed or was removed"""
+    if not app.config['COMPILED_TEMPLATES']:
+        return 0
+    _compiled_assets['fonts'] = list(_font_files_signature(FONTS_DIR))
+    current = set()
+    for entry in refresh_template_registry().values():
+        if get_compiled_template(entry['template_content']) is not None:
+            current.add(_compiled_template_key(entry['body_digest']))
+    
+    with _compiled_templates_lock:
+        for key in list(_compiled_templates):
+            if key not in current:
+                del _compiled_templates[key]
+        if os.path.isdir(COMPILED_TEMPLATES_DIR):
+            for filename in os.listdir(COMPILED_TEMPLATES_DIR):
+                if filename.split('.')[0] not in current:
+                    os.remove(os.path.join(COMPILED_TEMPLATES_DIR, filename))
+    return len(current)
+
+def overlay_consent_fields(compiled, fields):
+    """Lay a consent's details over a copy of its compiled body pages"""
+    # Each overlay page draws its body page as a form XObject, then the details on top.
+    # The body is only a placeholder form here and is swapped for the compiled page below
+    packet = io.BytesIO()
+    can = new_pdf_canvas(packet)
+    for page in range(compiled['pages']):
+        can.beginForm(f"ConsentBody{page}")
+        can.endForm()
+    for page in range(compiled['pages']):
+        # Isolate the body's graphics state so the details land in default page space
+        can.saveState()
+        can.doForm(f"ConsentBody{page}")
+        can.restoreState()
+        for section, (section_page, y_position) in compiled['positions'].items():
+            if section_page == page:
+                draw_consent_fields(can, section, y_position, fields)
+        can.showPage()
     can.save()
     packet.seek(0)
+    
+    reader = PdfReader(io.BytesIO(compiled['pdf']))
+    overlay = PdfReader(packet)
+    writer = PdfWriter()
+    for index, (body_page, overlay_page) in enumerate(zip(reader.pages, overlay.pages)):
+        page = writer.add_page(overlay_page)
+        
+        # The body stream is copied still compressed - it is never parsed or re-encoded
+        body = body_page['/Contents'].get_object().clone(writer, force_duplicate=True)
+        body.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Form'),
+            NameObject('/BBox'): body_page.mediabox,
+            NameObject('/Resources'): body_page['/Resources'].get_object().clone(writer)
+        })
+        xobjects = page['/Resources'].get_object()['/XObject'].get_object()
+        xobjects[NameObject(f"/{pdfdoc.xObjectName(f'ConsentBody{index}')}")] = body.indirect_reference
+    
+    output = io.BytesIO()
+    writer.write(output)
+    output.seek(0)
+    return output
+
+def consent_created_time(created_at):
+    """Local time a consent was signed by the patient - created_at is stored by SQLite in UTC"""
+    if not created_at:
+        return datetime.now()
+    created = datetime.strptime(str(created_at)[:19], '%Y-%m-%d %H:%M:%S')
+    return created.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+def create_complete_consent_pdf(patient_info, patient_signature, relative_signature, nurse_signature, doctor_signature, consent_id, nurse_signed_by=None, doctor_signed_by=None, layout=None, nurse_signed_at=None, doctor_signed_at=None, created_at=None):
+    """Create a complete PDF consent form with header, content, and ALL signatures - each signature is a (hash, png) blob"""
+    fields = {
+        'patient_info': patient_info,
+        # Patient and relative sign when the consent row is created, so re-renders keep that time
+        'signed_at': consent_created_time(created_at),
+        'patient_signature': patient_signature,
+        'relative_signature': relative_signature,
+        'nurse_signature': nurse_signature,
+        'doctor_signature': doctor_signature,
+        'nurse_signed_by': nurse_signed_by,
+        'doctor_signed_by': doctor_signed_by,
+        'nurse_signed_at': nurse_signed_at,
+        'doctor_signed_at': doctor_signed_at
+    }
+    procedure_content = patient_info.get('procedure_details', '')
+    
+    # Unedited templates only need their details drawn over the precompiled body
+    compiled = None
+    try:
+        compiled = get_compiled_template(procedure_content)
+    except Exception as e:
+        print(f"⚠️ Compiled template unavailable, rendering in full: {e}")
+    
+    if compiled is not None:
+        packet = overlay_consent_fields(compiled, fields)
+        staff_page, staff_y = compiled['positions']['staff_signatures']
+    else:
+        positions = {}
+        
+        def draw_fields(can, section, y_position):
+            positions[section] = [can.getPageNumber() - 1, y_position]
+            draw_consent_fields(can, section, y_position, fields)
+        
+        # Font registry is built once per process
+        setup_fonts()
+        packet = io.BytesIO()
+        can = new_pdf_canvas(packet)
+        draw_consent_body(can, procedure_content, draw_fields)
+        can.save()
+        packet.seek(0)
+        staff_page, staff_y = positions['staff_signatures']
+    
+    # Remember where the staff row landed so later stages can stamp onto it
+    if layout is not None:
+        layout['page'] = staff_page
+        layout['staff_signature_y'] = staff_y - 20
     return packet
 
+# Bump when the PDF layout changes so archived consents are picked up for regeneration
+RENDER_LAYOUT_VERSION = 3
+
+def render_assets_signature():
+    """Fingerprint of the fonts and logo that feed every render"""
+    load_logo_image()
+    return [RENDER_LAYOUT_VERSION,
+            list(_font_files_signature(FONTS_DIR)),
+            _logo_cache['path'], _logo_cache['mtime']]
+
+def commit_consent_pdf(conn, consent_id, version, pdf_path, pdf_bytes, layout=None, fingerprint=None, stamped=False):
+    """Write a rendered PDF only if the consent row is still at the version it was rendered from -
+    returns False when a newer render owns the PDF"""
+    if conn.in_transaction:
+        conn.commit()
+    # The write lock serialises PDF writers across the web process, render workers and regenerate_pdfs.py
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        render_version, rendered_version = conn.execute('SELECT render_version, rendered_version FROM consents WHERE id = ?', (consent_id,)).fetchone()
+        # A stamp only applies on top of the render of the previous version
+        if render_version != version or (stamped and rendered_version != version - 1):
+            conn.rollback()
+            return False
+        pdf_size = write_pdf_atomically(pdf_path, pdf_bytes)
+        if stamped:
+            conn.execute("UPDATE consents SET rendered_version = ?, pdf_bytes = ?, render_status = 'ready', render_error = NULL WHERE id = ?",
+                         (version, pdf_size, consent_id))
+        else:
+            conn.execute("""UPDATE consents SET rendered_version = ?, pdf_bytes = ?, signature_layout = ?, render_fingerprint = ?,
+                                                render_status = 'ready', render_error = NULL WHERE id = ?""",
+                         (version, pdf_size, json.dumps(layout), fingerprint, consent_id))
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+
+# Consent columns a PDF is rendered from - any change to them changes the render fingerprint
+RENDER_INPUT_COLUMNS = ['patient_name', 'patient_age', 'patient_mrn', 'consent_required_for', 'consent_required_for_ml',
+                        'procedure_details', 'procedure_details_ml', 'doctor_name', 'signatory_name', 'signatory_relation',
+                        'patient_signature_hash', 'relative_signature_hash', 'nurse_signature_hash', 'doctor_signature_hash',
+                        'nurse_signed_by', 'doctor_signed_by', 'nurse_signed_at', 'doctor_signed_at', 'counsellor_id',
+                        'final_pdf', 'created_at']
+
+def regenerate_consent_pdf(conn, consent_id, skip_unchanged=False):
+    """Fully re-render a consent PDF from its database row and store its layout"""
+    c = conn.cursor()
+    c.row_factory = sqlite3.Row
+    c.execute(f'''SELECT {', '.join(RENDER_INPUT_COLUMNS)}, render_fingerprint, render_version
+                  FROM consents WHERE id = ?''', (consent_id,))
+    consent = c.fetchone()
+    if not consent or not consent['final_pdf']:
+        return 'missing'
+    
+    final_pdf_path = os.path.join(app.config['GENERATED_FOLDER'], consent['final_pdf'])
+    
+    # Everything the PDF is built from, so unchanged consents can be skipped
+    render_inputs = [consent[column] for column in RENDER_INPUT_COLUMNS]
+    fingerprint = hashlib.sha256(json.dumps([render_assets_signature(), render_inputs], default=str).encode()).hexdigest()
+    if skip_unchanged and consent['render_fingerprint'] == fingerprint and os.path.exists(final_pdf_path):
+        return 'skipped'
+    
+    patient_info = {
+        'name': consent['patient_name'],
+        'age': consent['patient_age'],
+        'mrn': consent['patient_mrn'],
+        'consent_required_for': consent['consent_required_for'],
+        'consent_required_for_ml': consent['consent_required_for_ml'],
+        'procedure_details': consent['procedure_details'],
+        'procedure_details_ml': consent['procedure_details_ml'],
+        'counsellor': consent['counsellor_id'],
+        'doctor': consent['doctor_name'],
+        'signatory_name': consent['signatory_name'],
+        'signatory_relation': consent['signatory_relation']
+    }
+    
+    patient_signature, relative_signature, nurse_signature, doctor_signature = [load_signature_blob(conn, consent[f'{role}_signature_hash']) for role in SIGNATURE_ROLES]
+    
+    layout = {}
+    pdf_packet = create_complete_consent_pdf(patient_info, patient_signature, relative_signature, nurse_signature, doctor_signature, consent_id,
+                                             consent['nurse_signed_by'], consent['doctor_signed_by'], layout=layout,
+                                             nurse_signed_at=consent['nurse_signed_at'], doctor_signed_at=consent['doctor_signed_at'],
+                                             created_at=consent['created_at'])
+    if not commit_consent_pdf(conn, consent_id, consent['render_version'], final_pdf_path, pdf_packet.getvalue(), layout, fingerprint):
+        return 'superseded'
+    return 'rendered'
+
+def add_staff_signature_to_pdf(conn, consent_id, role):
+    """Stamp a nurse/doctor signature onto the existing PDF, re-rendering only as a fallback"""
+    c = conn.cursor()
+    c.execute(f'''SELECT final_pdf, signature_layout, doctor_name, {role}_signature_hash, {role}_signed_by, {role}_signed_at, render_version, rendered_version
+                  FROM consents WHERE id = ?''', (consent_id,))
+    consent = c.fetchone()
+    if not consent or not consent[0]:
+        return 'missing'
+    final_pdf, signature_layout, doctor_name, signature_hash, signed_by, signed_at, render_version, rendered_version = consent
+    final_pdf_path = os.path.join(app.config['GENERATED_FOLDER'], final_pdf)
+    
+    if rendered_version == render_version:
+        return 'current'
+    
+    # Stamping is only valid on the PDF of the version just before this signature
+    if rendered_version == render_version - 1 and signature_layout and os.path.exists(final_pdf_path):
+        try:
+            signature_blob = load_signature_blob(conn, signature_hash)
+            pdf_bytes = stamp_staff_signature(final_pdf_path, json.loads(signature_layout), role, signature_blob, signed_by, doctor_name, signed_at)
+            if pdf_bytes:
+                if not commit_consent_pdf(conn, consent_id, render_version, final_pdf_path, pdf_bytes, stamped=True):
+                    return 'superseded'
+                return 'stamped'
+        except Exception as e:
+            print(f"⚠️ Could not stamp {role} signature onto {final_pdf_path}: {e}")
+    
+    print(f"Re-rendering consent {consent_id} PDF in full...")
+    return regenerate_consent_pdf(conn, consent_id)
+
+# Background PDF rendering - a bounded process pool so signing requests return immediately
+app.config['RENDER_WORKERS'] = int(os.environ.get('RENDER_WORKERS', os.cpu_count() or 2))
+
+# Workers come from a fork server (spawn where there is none), never a fork of the threaded web
+# process - a lock another thread held at fork time would stay locked in the worker forever
+RENDER_MP_CONTEXT = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+_render_pool = None
+_render_pool_lock = threading.RLock()
+
+def _init_render_worker():
+    """Pre-warm fonts and the logo once per worker process"""
+    setup_fonts()
+    load_logo_image()
+
+def get_render_pool():
+    """Create the render process pool on first use"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=app.config['RENDER_WORKERS'], mp_context=RENDER_MP_CONTEXT,
+                                               initializer=_init_render_worker)
+        return _render_pool
+
+def reset_render_pool(pool):
+    """Drop a broken render pool so the next job starts a fresh one"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False)
+
+# Render states only move while the PDF is behind the row - a superseded job can't undo a newer 'ready'
+RENDER_OUTSTANDING_SQL = 'COALESCE(rendered_version, -1) < render_version'
+
+def set_render_status(conn, consent_id, status, error=None):
+    """Record the render state of a consent PDF that is still waiting for a render"""
+    conn.execute(f'UPDATE consents SET render_status = ?, render_error = ? WHERE id = ? AND {RENDER_OUTSTANDING_SQL}', (status, error, consent_id))
+    conn.commit()
+
+def render_consent_job(consent_id, role=None):
+    """Pool job: render the consent PDF, or stamp the nurse/doctor signature onto it"""
+    conn = get_db('consents')
+    try:
+        set_render_status(conn, consent_id, 'rendering')
+        if role:
+            result = add_staff_signature_to_pdf(conn, consent_id, role)
+        else:
+            result = regenerate_consent_pdf(conn, consent_id)
+        if result == 'missing':
+            raise ValueError("Consent row or PDF filename not found")
+        if result in ('stamped', 'rendered'):
+            pdf_bytes = conn.execute('SELECT pdf_bytes FROM consents WHERE id = ?', (consent_id,)).fetchone()[0]
+            if pdf_bytes:
+                print(f"📄 Consent {consent_id} PDF {result}: {pdf_bytes / 1024:.1f} KB")
+        return 'ready'
+    except Exception as e:
+        print(f"❌ Render job for consent {consent_id} failed: {e}")
+        conn.rollback()
+        set_render_status(conn, consent_id, 'failed', str(e))
+        return 'failed'
+
+def queue_consent_render(consent_id, role=None):
+    """Queue a render job - jobs may finish in any order, commit_consent_pdf keeps the newest PDF"""
+    def render_inline(reason):
+        # Pool unavailable - render inline rather than lose the PDF
+        print(f"⚠️ Render pool unavailable ({reason}), rendering consent {consent_id} inline")
+        future = Future()
+        future.set_result(render_consent_job(consent_id, role))
+        return future
+    
+    def watch(pool, future):
+        def check(done):
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                print(f"⚠️ Render worker died while rendering consent {consent_id}, restarting the pool")
+                reset_render_pool(pool)
+                set_render_status(get_db('consents'), consent_id, 'failed', 'Render worker died')
+        future.add_done_callback(check)
+        return future
+    
+    try:
+        pool = get_render_pool()
+        try:
+            return watch(pool, pool.submit(render_consent_job, consent_id, role))
+        except BrokenProcessPool:
+            reset_render_pool(pool)
+            pool = get_render_pool()
+            return watch(pool, pool.submit(render_consent_job, consent_id, role))
+    except Exception as e:
+        return render_inline(e)
+
 # ========== ROUTES ==========
 
 @app.route('/')
@@ -1011,26 +2737,55 @@ def relative_dashboard():
     return render_template('relative_dashboard.html')
 
 
+def record_staff_signature(consent_id, role, signature_data, signed_by, signed_at):
+    """Build the writer mutation that records a nurse/doctor signature and moves the status on"""
+    signature_blob = prepare_signature_blob(signature_data)
+    
+    def mutation(conn):
+        signature_hash = insert_signature_blob(conn, signature_blob)
+        conn.execute(f'UPDATE consents SET {role}_signature_hash = ?, {role}_signed_by = ?, {role}_signed_at = ?, render_status = ?, render_version = render_version + 1 WHERE id = ?', 
+                     (signature_hash, signed_by, signed_at, 'queued', consent_id))
+        conn.execute(f'UPDATE consents SET status = {CONSENT_STATUS_SQL} WHERE id = ?', (consent_id,))
+        return consent_id
+    return mutation
+
+def get_pending_consents(status):
+    """Work queue for a signing stage - answered from idx_consents_status_created alone"""
+    conn = get_db('consents')
+    c = conn.cursor()
+    c.execute('''SELECT id, patient_name, patient_mrn, consent_required_for, doctor_name, created_at 
+                 FROM consents 
+                 WHERE status = ?
+                 ORDER BY created_at DESC''', (status,))
+    pending_consents = c.fetchall()
+    return pending_consents
+
 @app.route('/nurse_dashboard')
 def nurse_dashboard():
     if 'username' not in session or session.get('user_type') != 'nurse':
         return redirect(url_for('login'))
     
     # Get consents pending nurse signature (after patient signature)
-    conn = sqlite3.connect('consents.db')
-    c = conn.cursor()
-    c.execute('''SELECT id, patient_name, patient_mrn, consent_required_for, doctor_name, created_at 
-                 FROM consents 
-                 WHERE nurse_signature_data IS NULL AND patient_signature_data IS NOT NULL
-                 ORDER BY created_at DESC''')
-    pending_consents = c.fetchall()
-    conn.close()
+    pending_consents = get_pending_consents('awaiting_nurse')
     
     return render_template('nurse_dashboard.html',
                          username=session['username'],
                          full_name=session.get('full_name', ''),
                          pending_consents=pending_consents)
 
+@app.route('/doctor_dashboard')
+def doctor_dashboard():
+    if 'username' not in session or session.get('user_type') != 'doctor':
+        return redirect(url_for('login'))
+    
+    # Get consents pending doctor signature (after nurse signature)
+    pending_consents = get_pending_consents('awaiting_doctor')
+    
+    return render_template('doctor_dashboard.html',
+                         username=session['username'],
+                         full_name=session.get('full_name', ''),
+                         pending_consents=pending_consents)
+
 @app.route('/admin/add_user', methods=['POST'])
 def admin_add_user():
     if 'username' not in session or session.get('user_type') != 'admin':
@@ -1100,8 +2855,13 @@ def start_consent():
     signatory_relation = request.form['signatory_relation']
     signatory_mobile = request.form['signatory_mobile']
     
-    # Get Malayalam content - it's the same as procedure_details now
-    procedure_details_ml = request.form.get('procedure_details_ml', procedure_details)
+    # Malayalam content - an edited translation from the form wins and is never sent to the
+    # backend, otherwise both fields go through the translation pipeline together
+    procedure_details_ml = request.form.get('procedure_details_ml', '')
+    if not procedure_details_ml.strip() or procedure_details_ml == procedure_details:
+        consent_required_for_ml, procedure_details_ml = translate_texts([consent_required_for, procedure_details])
+    else:
+        consent_required_for_ml = translate_text(consent_required_for)
     
     # DEBUG: Print what we're receiving
     print(f"🔍 DEBUG - Procedure Details Received:")
@@ -1116,7 +2876,7 @@ def start_consent():
         'patient_age': patient_age,
         'patient_mrn': patient_mrn,
         'consent_required_for': consent_required_for,
-        'consent_required_for_ml': consent_required_for,  # Same as English for now
+        'consent_required_for_ml': consent_required_for_ml,
         'procedure_details': procedure_details,  # This should have the edited content
         'procedure_details_ml': procedure_details_ml,  # This should have the edited content
         'counsellor': session['username'],
@@ -1193,17 +2953,32 @@ def get_consent_template(template_name):
     if 'username' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    consent_types = get_consent_types()
+    template_data = refresh_template_registry().get(template_name)
     
-    if template_name in consent_types:
-        template_data = consent_types[template_name]
-        return jsonify({
+    if template_data:
+        response = jsonify({
             'form_name': template_data['display_name'],
             'template_content': template_data['template_content']
         })
+        # Tablets revalidate with If-None-Match / If-Modified-Since and get a 304
+        response.set_etag(template_data['etag'])
+        response.last_modified = template_data['last_modified']
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
     else:
         return jsonify({'error': 'Template not found'}), 404
 
+@app.route('/api/consent_types/search')
+def consent_type_search():
+    """Typeahead API for picking a consent form"""
+    if 'username' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', TYPEAHEAD_LIMIT, type=int), 50))
+    return jsonify({'query': query, 'results': search_consent_types(query, limit)})
+
 @app.route('/signature')
 def signature_page():
     if 'username' not in session or 'current_consent' not in session:
@@ -1223,56 +2998,39 @@ def save_patient_signatures():
     consent_data = session['current_consent']
     
     try:
-        # Save to database first
-        conn = sqlite3.connect('consents.db')
-        c = conn.cursor()
-        c.execute('''INSERT INTO consents 
-                     (patient_name, patient_age, patient_mrn, consent_type, patient_signature_data, relative_signature_data, counsellor_id, signatory_name, signatory_relation, signatory_mobile, consent_required_for, consent_required_for_ml, procedure_details, procedure_details_ml, doctor_name)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (consent_data['patient_name'], consent_data['patient_age'], 
-                   consent_data['patient_mrn'], consent_data['consent_type'],
-                   patient_signature_data, relative_signature_data, session['username'],
-                   consent_data['signatory_name'], consent_data['signatory_relation'], 
-                   consent_data['signatory_mobile'], consent_data['consent_required_for'],
-                   consent_data['consent_required_for_ml'], consent_data['procedure_details'],
-                   consent_data['procedure_details_ml'], consent_data['doctor']))
-        conn.commit()
-        consent_id = c.lastrowid
-        
-        # Generate PDF filename
-        final_pdf_filename = f"MRN_{consent_data['patient_mrn']}_Consent_{consent_id}.pdf"
-        
-        # Update with final PDF path
-        c.execute('UPDATE consents SET final_pdf = ? WHERE id = ?', 
-                  (final_pdf_filename, consent_id))
-        conn.commit()
+        # Signatures are decoded once and stored by content hash
+        patient_signature_blob = prepare_signature_blob(patient_signature_data)
+        relative_signature_blob = prepare_signature_blob(relative_signature_data)
+        counsellor = session['username']
         
-        # Generate initial PDF with patient signatures only
-        patient_info = {
-            'name': consent_data['patient_name'],
-            'age': consent_data['patient_age'],
-            'mrn': consent_data['patient_mrn'],
-            'consent_required_for': consent_data['consent_required_for'],
-            'consent_required_for_ml': consent_data['consent_required_for_ml'],
-            'procedure_details': consent_data['procedure_details'],
-            'procedure_details_ml': consent_data['procedure_details_ml'],
-            'counsellor': session['username'],
-            'doctor': consent_data['doctor'],
-            'signatory_name': consent_data['signatory_name'],
-            'signatory_relation': consent_data['signatory_relation']
-        }
-        
-        # Create PDF with patient signatures only (nurse and doctor pending)
-        pdf_packet = create_complete_consent_pdf(patient_info, patient_signature_data, relative_signature_data, None, None, consent_id)
+        def insert_consent(conn):
+            c = conn.cursor()
+            patient_signature_hash = insert_signature_blob(conn, patient_signature_blob)
+            relative_signature_hash = insert_signature_blob(conn, relative_signature_blob)
+            
+            c.execute('''INSERT INTO consents 
+                         (patient_name, patient_age, patient_mrn, consent_type, patient_signature_hash, relative_signature_hash, counsellor_id, signatory_name, signatory_relation, signatory_mobile, consent_required_for, consent_required_for_ml, procedure_details, procedure_details_ml, doctor_name, status, render_status)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                      (consent_data['patient_name'], consent_data['patient_age'], 
+                       consent_data['patient_mrn'], consent_data['consent_type'],
+                       patient_signature_hash, relative_signature_hash, counsellor,
+                       consent_data['signatory_name'], consent_data['signatory_relation'], 
+                       consent_data['signatory_mobile'], consent_data['consent_required_for'],
+                       consent_data['consent_required_for_ml'], consent_data['procedure_details'],
+                       consent_data['procedure_details_ml'], consent_data['doctor'],
+                       'awaiting_nurse' if patient_signature_hash else 'awaiting_patient', 'queued'))
+            consent_id = c.lastrowid
+            
+            # PDF filename needs the row id; the PDF itself is rendered in the background
+            final_pdf_filename = f"MRN_{consent_data['patient_mrn']}_Consent_{consent_id}.pdf"
+            c.execute('UPDATE consents SET final_pdf = ? WHERE id = ?', (final_pdf_filename, consent_id))
+            return consent_id
         
-        # Save the PDF
-        final_pdf_path = os.path.join(app.config['GENERATED_FOLDER'], final_pdf_filename)
-        os.makedirs(os.path.dirname(final_pdf_path), exist_ok=True)
+        # Save to database first - one group-committed write
+        consent_id = write_consents(insert_consent)
         
-        with open(final_pdf_path, 'wb') as output_file:
-            output_file.write(pdf_packet.getvalue())
-            
-        conn.close()
+        # Render with patient signatures only (nurse and doctor pending)
+        queue_consent_render(consent_id)
         
         # Clear session
         session.pop('current_consent', None)
@@ -1295,11 +3053,10 @@ def patient_signature_success(consent_id):
         return redirect(url_for('login'))
     
     # Get consent details from database
-    conn = sqlite3.connect('consents.db')
+    conn = get_db('consents')
     c = conn.cursor()
     c.execute('SELECT patient_name, final_pdf FROM consents WHERE id = ?', (consent_id,))
     consent = c.fetchone()
-    conn.close()
     
     if not consent:
         return "Consent not found", 404
@@ -1307,7 +3064,32 @@ def patient_signature_success(consent_id):
     return render_template('patient_signature_success.html',
                          consent_id=consent_id,
                          patient_name=consent[0],
-                         final_pdf_filename=consent[1] if consent[1] else 'Pending')
+                         final_pdf_filename=consent[1] if consent[1] else 'Pending',
+                         render_status_url=url_for('render_status', consent_id=consent_id))
+
+@app.route('/api/render_status/<int:consent_id>')
+def render_status(consent_id):
+    """API endpoint polled by the success pages while the PDF renders"""
+    if 'username' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    conn = get_db('consents')
+    c = conn.cursor()
+    c.execute('SELECT render_status, render_error, final_pdf, pdf_bytes FROM consents WHERE id = ?', (consent_id,))
+    consent = c.fetchone()
+    
+    if not consent:
+        return jsonify({'error': 'Consent not found'}), 404
+    
+    status = consent[0] or 'ready'
+    return jsonify({
+        'consent_id': consent_id,
+        'status': status,
+        'error': consent[1],
+        'final_pdf_filename': consent[2],
+        'pdf_bytes': consent[3],
+        'download_url': url_for('download_consent', filename=consent[2]) if status == 'ready' and consent[2] else None
+    })
 
 @app.route('/nurse_signature/<int:consent_id>')
 def nurse_signature_page(consent_id):
@@ -1316,11 +3098,10 @@ def nurse_signature_page(consent_id):
         return redirect(url_for('login'))
     
     # Get consent details from database
-    conn = sqlite3.connect('consents.db')
+    conn = get_db('consents')
     c = conn.cursor()
     c.execute('SELECT patient_name, patient_age, patient_mrn, consent_required_for, consent_required_for_ml, procedure_details, procedure_details_ml, doctor_name, signatory_name, signatory_relation FROM consents WHERE id = ?', (consent_id,))
     consent = c.fetchone()
-    conn.close()
     
     if not consent:
         return "Consent not found", 404
@@ -1355,64 +3136,28 @@ def save_nurse_signature(consent_id):
     
     try:
         # Get consent details from database
-        conn = sqlite3.connect('consents.db')
+        conn = get_db('consents')
         c = conn.cursor()
-        c.execute('''SELECT patient_name, patient_age, patient_mrn, consent_required_for, consent_required_for_ml, procedure_details, procedure_details_ml, doctor_name, signatory_name, signatory_relation, 
-                            patient_signature_data, relative_signature_data, final_pdf 
-                     FROM consents WHERE id = ?''', (consent_id,))
+        c.execute('SELECT patient_name, final_pdf FROM consents WHERE id = ?', (consent_id,))
         consent = c.fetchone()
         
         if not consent:
-            conn.close()
             return "Consent not found", 404
         
         print(f"Updating consent {consent_id} with nurse signature")
         
         # Update database with nurse signature and who signed it
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        c.execute('UPDATE consents SET nurse_signature_data = ?, nurse_signed_by = ?, nurse_signed_at = ? WHERE id = ?', 
-                  (nurse_signature_data, session['username'], current_time, consent_id))
-        conn.commit()
-        
-        # Generate PDF with nurse signature added
-        patient_info = {
-            'name': consent[0],
-            'age': consent[1],
-            'mrn': consent[2],
-            'consent_required_for': consent[3],
-            'consent_required_for_ml': consent[4],
-            'procedure_details': consent[5],
-            'procedure_details_ml': consent[6],
-            'counsellor': session['username'],
-            'doctor': consent[7],
-            'signatory_name': consent[8],
-            'signatory_relation': consent[9]
-        }
-        
-        print("Creating consent PDF with nurse signature...")
-        
-        # Create PDF with patient, relative, and nurse signatures (doctor pending)
-        pdf_packet = create_complete_consent_pdf(patient_info, consent[10], consent[11], nurse_signature_data, None, consent_id, session['username'], None)
-        
-        # Save the PDF
-        final_pdf_path = os.path.join(app.config['GENERATED_FOLDER'], consent[12])
+        write_consents(record_staff_signature(consent_id, 'nurse', nurse_signature_data, session['username'], current_time))
         
-        print(f"Saving PDF: {final_pdf_path}")
+        # Stamp only the nurse block onto the existing PDF in the background
+        queue_consent_render(consent_id, 'nurse')
         
-        # Ensure the generated_pdfs folder exists
-        os.makedirs(os.path.dirname(final_pdf_path), exist_ok=True)
-        
-        # Write PDF to file
-        with open(final_pdf_path, 'wb') as output_file:
-            output_file.write(pdf_packet.getvalue())
-            
-        conn.close()
-        
-        print("PDF with nurse signature generated successfully")
         return render_template('nurse_signature_success.html',
                              consent_id=consent_id,
                              patient_name=consent[0],
-                             final_pdf_filename=consent[12])
+                             final_pdf_filename=consent[1],
+                             render_status_url=url_for('render_status', consent_id=consent_id))
     
     except Exception as e:
         print(f"Error saving nurse signature: {str(e)}")
@@ -1427,11 +3172,10 @@ def doctor_signature_page(consent_id):
         return redirect(url_for('login'))
     
     # Get consent details from database
-    conn = sqlite3.connect('consents.db')
+    conn = get_db('consents')
     c = conn.cursor()
     c.execute('SELECT patient_name, patient_age, patient_mrn, consent_required_for, consent_required_for_ml, procedure_details, procedure_details_ml, doctor_name, signatory_name, signatory_relation FROM consents WHERE id = ?', (consent_id,))
     consent = c.fetchone()
-    conn.close()
     
     if not consent:
         return "Consent not found", 404
@@ -1466,64 +3210,28 @@ def save_doctor_signature(consent_id):
     
     try:
         # Get consent details from database
-        conn = sqlite3.connect('consents.db')
+        conn = get_db('consents')
         c = conn.cursor()
-        c.execute('''SELECT patient_name, patient_age, patient_mrn, consent_required_for, consent_required_for_ml, procedure_details, procedure_details_ml, doctor_name, signatory_name, signatory_relation, 
-                            patient_signature_data, relative_signature_data, nurse_signature_data, final_pdf 
-                     FROM consents WHERE id = ?''', (consent_id,))
+        c.execute('SELECT patient_name, final_pdf FROM consents WHERE id = ?', (consent_id,))
         consent = c.fetchone()
         
         if not consent:
-            conn.close()
             return "Consent not found", 404
         
         print(f"Updating consent {consent_id} with doctor signature")
         
         # Update database with doctor signature and who signed it
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        c.execute('UPDATE consents SET doctor_signature_data = ?, doctor_signed_by = ?, doctor_signed_at = ? WHERE id = ?', 
-                  (doctor_signature_data, session['username'], current_time, consent_id))
-        conn.commit()
-        
-        # Generate final PDF with ALL signatures
-        patient_info = {
-            'name': consent[0],
-            'age': consent[1],
-            'mrn': consent[2],
-            'consent_required_for': consent[3],
-            'consent_required_for_ml': consent[4],
-            'procedure_details': consent[5],
-            'procedure_details_ml': consent[6],
-            'counsellor': session['username'],
-            'doctor': consent[7],
-            'signatory_name': consent[8],
-            'signatory_relation': consent[9]
-        }
-        
-        print("Creating complete consent PDF with ALL signatures...")
-        
-        # Create complete PDF with ALL signatures
-        pdf_packet = create_complete_consent_pdf(patient_info, consent[10], consent[11], consent[12], doctor_signature_data, consent_id, None, session['username'])
-        
-        # Save the PDF
-        final_pdf_path = os.path.join(app.config['GENERATED_FOLDER'], consent[13])
-        
-        print(f"Saving PDF: {final_pdf_path}")
-        
-        # Ensure the generated_pdfs folder exists
-        os.makedirs(os.path.dirname(final_pdf_path), exist_ok=True)
+        write_consents(record_staff_signature(consent_id, 'doctor', doctor_signature_data, session['username'], current_time))
         
-        # Write PDF to file
-        with open(final_pdf_path, 'wb') as output_file:
-            output_file.write(pdf_packet.getvalue())
-            
-        conn.close()
+        # Stamp only the doctor block onto the existing PDF in the background
+        queue_consent_render(consent_id, 'doctor')
         
-        print("PDF with ALL signatures generated successfully")
         return render_template('final_success.html',
                              consent_id=consent_id,
                              patient_name=consent[0],
-                             final_pdf_filename=consent[13])
+                             final_pdf_filename=consent[1],
+                             render_status_url=url_for('render_status', consent_id=consent_id))
     
     except Exception as e:
         print(f"Error saving doctor signature: {str(e)}")
@@ -1531,69 +3239,175 @@ def save_doctor_signature(consent_id):
         print(f"Full traceback: {traceback.format_exc()}")
         return f"Error saving signature: {str(e)}", 500
 
+# Consent downloads - conditional and range requests are answered here; in x-accel or
+# x-sendfile mode the fronting web server streams the bytes instead of a Python worker
+app.config['PDF_DOWNLOAD_MODE'] = os.environ.get('PDF_DOWNLOAD_MODE', '')  # '', 'x-accel' or 'x-sendfile'
+app.config['PDF_ACCEL_REDIRECT_PREFIX'] = os.environ.get('PDF_ACCEL_REDIRECT_PREFIX', '/protected/generated_pdfs/')
+app.config['USE_X_SENDFILE'] = app.config['PDF_DOWNLOAD_MODE'] == 'x-sendfile'
+
 @app.route('/download_consent/<filename>')
 def download_consent(filename):
     """Download the final signed PDF for HIS upload"""
     if 'username' not in session:
         return redirect(url_for('login'))
     
-    file_path = os.path.join(app.config['GENERATED_FOLDER'], filename)
+    # PDFs are written relative to the working directory; send_file would resolve against the app root
+    file_path = safe_join(os.path.abspath(app.config['GENERATED_FOLDER']), filename)
+    try:
+        stat = os.stat(file_path) if file_path else None
+    except OSError:
+        stat = None
+    if stat is None or not os.path.isfile(file_path):
+        return "File not found", 404
     
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True, download_name=filename)
+    # PDFs are replaced atomically on every stamp, so mtime and size identify a version
+    etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    
+    if app.config['PDF_DOWNLOAD_MODE'] == 'x-accel':
+        response = app.response_class(mimetype='application/pdf')
+        response.headers['X-Accel-Redirect'] = app.config['PDF_ACCEL_REDIRECT_PREFIX'] + quote(filename)
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
     else:
-        return "File not found", 404
+        # send_file sets X-Sendfile itself when USE_X_SENDFILE is on
+        response = send_file(file_path, mimetype='application/pdf', as_attachment=True, download_name=filename,
+                             conditional=not app.config['USE_X_SENDFILE'], etag=etag, last_modified=stat.st_mtime)
+    
+    if app.config['PDF_DOWNLOAD_MODE']:
+        # The web server sends the whole file, so only answer 304/412 here and leave Range to it
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            response.headers.pop('X-Accel-Redirect', None)
+            response.headers.pop('X-Sendfile', None)
+    
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+CONSENTS_PAGE_SIZE = 50
 
 @app.route('/consents')
 def view_consents():
     if 'username' not in session:
         return redirect(url_for('login'))
     
-    conn = sqlite3.connect('consents.db')
+    conn = get_db('consents')
     c = conn.cursor()
     
-    # First, let's check what columns actually exist in the table
-    c.execute("PRAGMA table_info(consents)")
-    columns = [column[1] for column in c.fetchall()]
-    print(f"Available columns: {columns}")  # Debug info
-    
-    # Build query based on available columns
+    # Fixed projection - signature payloads are never loaded, only whether they exist
     select_columns = [
-        'id', 'patient_name', 'patient_age', 'patient_mrn', 'consent_type'
-    ]
-    
-    # Add optional columns if they exist
-    optional_columns = [
+        'id', 'patient_name', 'patient_age', 'patient_mrn', 'consent_type',
         'consent_required_for', 'procedure_details', 'doctor_name',
         'signatory_name', 'signatory_relation', 'counsellor_id',
-        'created_at', 'final_pdf', 'patient_signature_data', 'relative_signature_data',
-        'nurse_signature_data', 'doctor_signature_data', 'nurse_signed_by', 'doctor_signed_by'
+        'created_at', 'final_pdf',
+        '(patient_signature_hash IS NOT NULL) AS has_patient_signature',
+        '(relative_signature_hash IS NOT NULL) AS has_relative_signature',
+        '(nurse_signature_hash IS NOT NULL) AS has_nurse_signature',
+        '(doctor_signature_hash IS NOT NULL) AS has_doctor_signature',
+        'nurse_signed_by', 'doctor_signed_by', 'status'
     ]
     
-    for col in optional_columns:
-        if col in columns:
-            select_columns.append(col)
-        else:
-            print(f"⚠️ Column '{col}' not found, skipping")
+    # Server-side filters
+    filters = {
+        'date_from': request.args.get('date_from', '').strip(),
+        'date_to': request.args.get('date_to', '').strip(),
+        'doctor': request.args.get('doctor', '').strip(),
+        'mrn': request.args.get('mrn', '').strip(),
+        'stage': request.args.get('stage', '').strip()
+    }
+    where = []
+    params = []
+    if filters['date_from']:
+        where.append('created_at >= ?')
+        params.append(filters['date_from'])
+    if filters['date_to']:
+        where.append("created_at < date(?, '+1 day')")
+        params.append(filters['date_to'])
+    if filters['doctor']:
+        where.append('doctor_name = ?')
+        params.append(filters['doctor'])
+    if filters['mrn']:
+        where.append('patient_mrn = ?')
+        params.append(filters['mrn'])
+    if filters['stage'] in CONSENT_STATUSES:
+        where.append('status = ?')
+        params.append(filters['stage'])
+    
+    # Keyset pagination on (created_at, id) - the cursor is the last row of the previous page
+    cursor = request.args.get('cursor', '')
+    if '|' in cursor:
+        cursor_created_at, cursor_id = cursor.rsplit('|', 1)
+        if cursor_id.isdigit():
+            where.append('(created_at < ? OR (created_at = ? AND id < ?))')
+            params.extend([cursor_created_at, cursor_created_at, int(cursor_id)])
     
     # Build the query
     query = f'''SELECT {', '.join(select_columns)} 
                 FROM consents 
-                ORDER BY created_at DESC'''
-    
-    print(f"Executing query: {query}")  # Debug info
+                {'WHERE ' + ' AND '.join(where) if where else ''}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?'''
     
-    c.execute(query)
+    c.execute(query, params + [CONSENTS_PAGE_SIZE + 1])
     consents = c.fetchall()
-    conn.close()
+    
+    # One extra row tells us whether there is a next page
+    next_cursor = None
+    if len(consents) > CONSENTS_PAGE_SIZE:
+        consents = consents[:CONSENTS_PAGE_SIZE]
+        next_cursor = f"{consents[-1][11]}|{consents[-1][0]}"
     
     consent_types = get_consent_types()
     
     return render_template('consents_list.html', 
                          consents=consents, 
                          consent_types=consent_types,
+                         filters=filters,
+                         next_cursor=next_cursor,
                          username=session['username'])
 
+def search_consents(query, limit=CONSENT_SEARCH_LIMIT):
+    """Ranked full-text search over consents - every word is matched as a prefix"""
+    # Quote each word so user input can't inject FTS5 query syntax
+    words = re.findall(r'[\w\u0D00-\u0D7F]+', query)
+    if not words or limit < 1:
+        return []
+    match = ' '.join('"' + word.replace('"', '') + '"*' for word in words)
+    
+    conn = get_db('consents')
+    c = conn.cursor()
+    c.execute('''SELECT c.id, c.patient_name, c.patient_mrn, c.consent_required_for, c.status, c.created_at,
+                        bm25(consents_fts) AS score,
+                        snippet(consents_fts, -1, '[', ']', '…', 12)
+                 FROM consents_fts
+                 JOIN consents c ON c.id = consents_fts.rowid
+                 WHERE consents_fts MATCH ?
+                 ORDER BY score
+                 LIMIT ?''', (match, limit))
+    return [{
+        'id': row[0],
+        'patient_name': row[1],
+        'patient_mrn': row[2],
+        'consent_required_for': row[3],
+        'status': row[4],
+        'created_at': row[5],
+        'score': row[6],
+        'snippet': row[7]
+    } for row in c.fetchall()]
+
+@app.route('/api/consents/search')
+def consent_search():
+    """Find consents by partial patient name, MRN or procedure text"""
+    if 'username' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not CONSENTS_SCHEMA['fts']:
+        return jsonify({'error': 'Search is not available'}), 503
+    
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', CONSENT_SEARCH_LIMIT, type=int), 100))
+    return jsonify({'query': query, 'results': search_consents(query, limit)})
+
 @app.route('/logout')
 def logout():
     session.pop('username', None)
@@ -1617,6 +3431,15 @@ if __name__ == '__main__':
     init_users_database()
     init_database()
     
+    # Pre-warm the font registry so the first consent doesn't pay for it
+    setup_fonts()
+    
+    # Render the static body of every template once
+    print(f"✅ Compiled {compile_consent_templates()} consent templates")
+    
+    # Pre-translate the template catalog in the background
+    ensure_translation_warmup()
+    
     print("=" * 60)
     print("MES Medical College - Digital Consent System")
     print("✅ Database created with MULTI-SIGNATURE support")
@@ -0,0 +1,91 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from app import app, get_db, migrate_consents_database, regenerate_consent_pdf, _init_render_worker, RENDER_MP_CONTEXT
+
+BATCH_SIZE = 500
+
+def regenerate_one(consent_id, force):
+    """Worker job: re-render a single consent, skipping it if its inputs are unchanged"""
+    conn = get_db('consents')
+    try:
+        return consent_id, regenerate_consent_pdf(conn, consent_id, skip_unchanged=not force), None
+    except Exception as e:
+        conn.rollback()
+        return consent_id, 'failed', str(e)
+
+def iter_consent_ids(start_id):
+    """Stream consent ids in id order, one small batch at a time"""
+    conn = get_db('consents')
+    last_id = start_id - 1
+    while True:
+        rows = conn.execute('SELECT id FROM consents WHERE id > ? ORDER BY id LIMIT ?', (last_id, BATCH_SIZE)).fetchall()
+        if not rows:
+            return
+        for (consent_id,) in rows:
+            yield consent_id
+        last_id = rows[-1][0]
+
+def regenerate_pdfs(workers, start_id=1, force=False):
+    """Regenerate every archived consent PDF across a process pool"""
+    counts = {'rendered': 0, 'skipped': 0, 'superseded': 0, 'missing': 0, 'failed': 0}
+    failures = []
+    started = time.monotonic()
+    
+    print(f"🔄 Regenerating consent PDFs from id {start_id} with {workers} workers...")
+    
+    with ProcessPoolExecutor(max_workers=workers, mp_context=RENDER_MP_CONTEXT, initializer=_init_render_worker) as pool:
+        pending = set()
+        
+        def collect(done):
+            for future in done:
+                consent_id, result, error = future.result()
+                counts[result] += 1
+                if error:
+                    failures.append((consent_id, error))
+                    print(f"❌ Consent {consent_id} failed: {error}")
+                processed = sum(counts.values())
+                if processed % 100 == 0:
+                    elapsed = time.monotonic() - started
+                    print(f"   {processed} processed (last id {consent_id}), {processed / elapsed:.1f}/s")
+        
+        for consent_id in iter_consent_ids(start_id):
+            # Keep a bounded number of jobs in flight so memory stays flat
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(pool.submit(regenerate_one, consent_id, force))
+        
+        if pending:
+            done, _ = wait(pending)
+            collect(done)
+    
+    elapsed = time.monotonic() - started
+    total = sum(counts.values())
+    print(f"\n✅ Processed {total} consents in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f}/s)")
+    print(f"✓ rendered: {counts['rendered']}")
+    print(f"✓ skipped (unchanged): {counts['skipped']}")
+    print(f"✓ superseded (signed while rendering): {counts['superseded']}")
+    print(f"✓ missing PDF filename: {counts['missing']}")
+    print(f"✓ failed: {counts['failed']}")
+    for consent_id, error in failures:
+        print(f"   - {consent_id}: {error}")
+    
+    # Output size, to spot regressions between layout versions
+    sized, total_bytes, average_bytes = get_db('consents').execute(
+        'SELECT COUNT(pdf_bytes), SUM(pdf_bytes), AVG(pdf_bytes) FROM consents WHERE id >= ?', (start_id,)).fetchone()
+    if sized:
+        print(f"✓ PDF size: {total_bytes / 1048576:.1f} MB across {sized} consents, {average_bytes / 1024:.1f} KB average")
+    return counts
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Regenerate archived consent PDFs from consents.db")
+    parser.add_argument('--workers', type=int, default=app.config['RENDER_WORKERS'], help="number of render processes")
+    parser.add_argument('--start-id', type=int, default=1, help="first consent id to process")
+    parser.add_argument('--force', action='store_true', help="re-render even if inputs are unchanged")
+    args = parser.parse_args()
+    
+    migrate_consents_database()
+    counts = regenerate_pdfs(args.workers, args.start_id, args.force)
+    raise SystemExit(1 if counts['failed'] else 0)
@@ -1,52 +1,26 @@
 import sqlite3
 import os
 
+from app import CONSENTS_DB, migrate_consents_database
+
 def reset_database():
     # Delete existing database
-    if os.path.exists('consents.db'):
-        os.remove('consents.db')
+    if os.path.exists(CONSENTS_DB):
+        os.remove(CONSENTS_DB)
         print("Old database deleted")
     
-    # Create new database with correct schema
-    conn = sqlite3.connect('consents.db')
-    c = conn.cursor()
+    # Create new database with the same versioned schema the app boots with
+    version = migrate_consents_database()
     
-    c.execute('''CREATE TABLE consents
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  patient_name TEXT,
-                  patient_age INTEGER,
-                  patient_mrn TEXT,
-                  consent_type TEXT,
-                  original_pdf TEXT,
-                  final_pdf TEXT,
-                  signature_data TEXT,
-                  counsellor_id TEXT,
-                  signatory_name TEXT,
-                  signatory_relation TEXT,
-                  signatory_mobile TEXT,
-                  procedure_name TEXT,
-                  doctor_signature TEXT,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn = sqlite3.connect(CONSENTS_DB)
+    columns = [column[1] for column in conn.execute("PRAGMA table_info(consents)")]
+    conn.close()
     
-    print("New database created with all columns:")
-    print("✓ patient_name")
-    print("✓ patient_age") 
-    print("✓ patient_mrn")
-    print("✓ consent_type")
-    print("✓ original_pdf")
-    print("✓ final_pdf")
-    print("✓ signature_data")
-    print("✓ counsellor_id")
-    print("✓ signatory_name")
-    print("✓ signatory_relation")
-    print("✓ signatory_mobile")
-    print("✓ procedure_name")
-    print("✓ doctor_signature")
-    print("✓ created_at")
+    print(f"New database created at schema version {version} with all columns:")
+    for column in columns:
+        print(f"✓ {column}")
     
-    conn.commit()
-    conn.close()
     print("\nDatabase reset complete!")
 
 if __name__ == '__main__':
-    reset_database()
\ No newline at end of file
+    reset_database()
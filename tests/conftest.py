@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app creates its folders and opens its databases relative to the working directory on import
+os.chdir(tempfile.mkdtemp(prefix='digital_consent_tests_'))
+
+import app as consent_app  # noqa: E402
+
+
+def reset_app_state(module):
+    """Forget per-process connections and caches so the next call sees the new working directory"""
+    module._db_pool.update(pid=None, idle={})
+    module._db_local.__dict__.clear()
+    module._writer_state.update(pid=None, queue=None)
+    module.CONSENTS_SCHEMA.update(version=0, pending=[], columns=frozenset(), fts=False)
+    module._template_registry.update(entries={}, checked_at=None)
+    module._catalog_index.update(signature=None, checked_at=None)
+    module._translation_cache.clear()
+    module._translation_store_ready.clear()
+    module._translation_warmup_started.clear()
+    module._compiled_templates.clear()
+    module._signature_cache.clear()
+    module._compiled_assets['fonts'] = None
+    module._logo_cache.update(path=None, mtime=None, image=None, checked_at=None)
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module working in an empty directory with a freshly migrated consents.db"""
+    monkeypatch.chdir(tmp_path)
+    # Warmup threads would race the tests - test_translation_cache turns it back on
+    monkeypatch.setitem(consent_app.app.config, 'TRANSLATION_WARMUP', False)
+    for folder in ('UPLOAD_FOLDER', 'GENERATED_FOLDER', 'STATIC_FOLDER'):
+        os.makedirs(consent_app.app.config[folder], exist_ok=True)
+    reset_app_state(consent_app)
+    consent_app.migrate_consents_database()
+    yield consent_app
+    reset_app_state(consent_app)
+
+
+@pytest.fixture
+def client(app_module):
+    """Test client logged in as an admin"""
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as flask_session:
+        flask_session['username'] = 'admin'
+        flask_session['user_type'] = 'admin'
+    return test_client
+
+
+@pytest.fixture
+def rendered(app_module, monkeypatch):
+    """Replace render_template with a recorder - the repo ships no Jinja templates"""
+    calls = []
+
+    def fake_render_template(template_name, **context):
+        calls.append((template_name, context))
+        return template_name
+
+    monkeypatch.setattr(app_module, 'render_template', fake_render_template)
+    return calls
+
+
+@pytest.fixture
+def insert_consent(app_module):
+    """Insert a consent row directly and return its id"""
+    def insert(**values):
+        row = {
+            'patient_name': 'Test Patient',
+            'patient_age': 40,
+            'patient_mrn': 'MRN001',
+            'consent_type': 'general',
+            'consent_required_for': 'Appendectomy',
+            'procedure_details': 'Removal of the appendix.',
+            'doctor_name': 'Dr. Sajid',
+            'status': 'awaiting_nurse'
+        }
+        row.update(values)
+        conn = app_module.get_db('consents')
+        cursor = conn.execute(f"INSERT INTO consents ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                              list(row.values()))
+        conn.commit()
+        return cursor.lastrowid
+    return insert
@@ -0,0 +1,72 @@
+import io
+import os
+
+from PIL import Image
+from PyPDF2 import PdfReader
+
+TEMPLATE_TEXT = 'Procedure: Knee replacement.\nRisks: Bleeding and infection.'
+
+
+def write_logo(app_module, colour, mtime):
+    path = os.path.join(app_module.app.config['STATIC_FOLDER'], 'mes-logo.png')
+    Image.new('RGB', (300, 300), colour).save(path, format='PNG')
+    os.utime(path, (mtime, mtime))
+
+
+def image_colours(pdf_bytes):
+    """First pixel of every image XObject, looking inside form XObjects too"""
+    colours = []
+
+    def walk(resources):
+        xobjects = resources.get('/XObject') if resources else None
+        for xobject in (xobjects.get_object().values() if xobjects else []):
+            xobject = xobject.get_object()
+            if xobject['/Subtype'] == '/Image':
+                data = xobject.get_data()
+                if data.startswith(b'\xff\xd8'):
+                    colours.append(Image.open(io.BytesIO(data)).convert('RGB').getpixel((0, 0)))
+                else:
+                    colours.append(tuple(data[:3]))
+            else:
+                walk(xobject.get('/Resources'))
+
+    for page in PdfReader(io.BytesIO(pdf_bytes)).pages:
+        walk(page.get('/Resources'))
+    return colours
+
+
+def is_red(colour):
+    return colour[0] > 200 and colour[1] < 60 and colour[2] < 60
+
+
+def is_blue(colour):
+    return colour[2] > 200 and colour[0] < 60 and colour[1] < 60
+
+
+def test_replaced_logo_reaches_compiled_templates(app_module, insert_consent):
+    with open(os.path.join(app_module.app.config['UPLOAD_FOLDER'], 'knee.txt'), 'w', encoding='utf-8') as f:
+        f.write(TEMPLATE_TEXT)
+    write_logo(app_module, (255, 0, 0), 1_700_000_000)
+
+    consent_id = insert_consent(final_pdf='consent_logo.pdf', procedure_details=TEMPLATE_TEXT)
+    conn = app_module.get_db('consents')
+    assert app_module.regenerate_consent_pdf(conn, consent_id) == 'rendered'
+    first = app_module.get_compiled_template(TEMPLATE_TEXT)
+    assert first is not None
+    assert any(is_red(colour) for colour in image_colours(first['pdf']))
+
+    # The logo is swapped on disk and picked up on the next recheck
+    write_logo(app_module, (0, 0, 255), 1_700_000_100)
+    app_module._logo_cache['checked_at'] = None
+
+    assert app_module.regenerate_consent_pdf(conn, consent_id) == 'rendered'
+    second = app_module.get_compiled_template(TEMPLATE_TEXT)
+    colours = image_colours(second['pdf'])
+    assert any(is_blue(colour) for colour in colours)
+    assert not any(is_red(colour) for colour in colours)
+    assert list(app_module._compiled_templates.values()) == [second]
+
+    with open(os.path.join(app_module.app.config['GENERATED_FOLDER'], 'consent_logo.pdf'), 'rb') as f:
+        colours = image_colours(f.read())
+    assert any(is_blue(colour) for colour in colours)
+    assert not any(is_red(colour) for colour in colours)
@@ -0,0 +1,45 @@
+def list_page(client, rendered, **params):
+    rendered.clear()
+    response = client.get('/consents', query_string=params)
+    assert response.status_code == 200
+    template_name, context = rendered[-1]
+    assert template_name == 'consents_list.html'
+    return context
+
+
+def test_keyset_pages_cover_every_row_once(app_module, client, rendered, insert_consent):
+    # Several rows share a timestamp so the id tiebreak matters
+    for index in range(2 * app_module.CONSENTS_PAGE_SIZE + 7):
+        insert_consent(patient_name=f'Patient {index}', created_at=f'2026-01-{1 + index // 10:02d} 09:00:00')
+
+    seen = []
+    cursor = None
+    while True:
+        context = list_page(client, rendered, **({'cursor': cursor} if cursor else {}))
+        seen += [(row[11], row[0]) for row in context['consents']]
+        cursor = context['next_cursor']
+        if cursor is None:
+            break
+
+    assert len(seen) == 2 * app_module.CONSENTS_PAGE_SIZE + 7
+    assert len(set(seen)) == len(seen)
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_cursor_combines_with_filters(app_module, client, rendered, insert_consent):
+    for index in range(app_module.CONSENTS_PAGE_SIZE + 5):
+        insert_consent(patient_mrn='MRN-A', created_at='2026-02-01 10:00:00')
+        insert_consent(patient_mrn='MRN-B', created_at='2026-02-01 10:00:00')
+
+    first = list_page(client, rendered, mrn='MRN-A')
+    second = list_page(client, rendered, mrn='MRN-A', cursor=first['next_cursor'])
+    assert second['next_cursor'] is None
+    rows = first['consents'] + second['consents']
+    assert len(rows) == app_module.CONSENTS_PAGE_SIZE + 5
+    assert {row[3] for row in rows} == {'MRN-A'}
+
+
+def test_malformed_cursor_is_ignored(client, rendered, insert_consent):
+    insert_consent()
+    context = list_page(client, rendered, cursor='not-a-cursor')
+    assert len(context['consents']) == 1
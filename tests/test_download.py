@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+PDF_BYTES = b'%PDF-1.4\n' + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def consent_pdf(app_module):
+    with open(os.path.join(app_module.app.config['GENERATED_FOLDER'], 'consent_1.pdf'), 'wb') as f:
+        f.write(PDF_BYTES)
+    return '/download_consent/consent_1.pdf'
+
+
+@pytest.fixture
+def download_mode(app_module, monkeypatch):
+    def set_mode(mode):
+        monkeypatch.setitem(app_module.app.config, 'PDF_DOWNLOAD_MODE', mode)
+        monkeypatch.setitem(app_module.app.config, 'USE_X_SENDFILE', mode == 'x-sendfile')
+    return set_mode
+
+
+def test_full_download_has_validators(client, consent_pdf):
+    response = client.get(consent_pdf)
+    assert response.status_code == 200
+    assert response.data == PDF_BYTES
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'private' in response.headers['Cache-Control']
+
+
+def test_matching_etag_gets_not_modified(client, consent_pdf):
+    etag = client.get(consent_pdf).headers['ETag']
+    response = client.get(consent_pdf, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_range_request_gets_partial_content(client, consent_pdf):
+    response = client.get(consent_pdf, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == PDF_BYTES[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(PDF_BYTES)}'
+
+
+def test_replaced_pdf_gets_a_new_etag(app_module, client, consent_pdf):
+    etag = client.get(consent_pdf).headers['ETag']
+    path = os.path.join(app_module.app.config['GENERATED_FOLDER'], 'consent_1.pdf')
+    with open(path, 'ab') as f:
+        f.write(b'%%EOF\n')
+    response = client.get(consent_pdf, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('mode, header', [('x-sendfile', 'X-Sendfile'), ('x-accel', 'X-Accel-Redirect')])
+def test_offloaded_download_leaves_range_to_the_web_server(client, consent_pdf, download_mode, mode, header):
+    download_mode(mode)
+    response = client.get(consent_pdf, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 200
+    assert 'Content-Range' not in response.headers
+    assert response.headers[header].endswith('consent_1.pdf')
+
+    not_modified = client.get(consent_pdf, headers={'If-None-Match': response.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert header not in not_modified.headers
+
+
+def test_unknown_or_escaping_paths_are_not_found(client, rendered, consent_pdf):
+    assert client.get('/download_consent/missing.pdf').status_code == 404
+    assert client.get('/download_consent/..%2Fconsents.db').status_code == 404
+
+
+def test_download_requires_login(app_module, consent_pdf):
+    response = app_module.app.test_client().get(consent_pdf)
+    assert response.status_code == 302
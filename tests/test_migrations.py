@@ -0,0 +1,109 @@
+import base64
+import io
+import sqlite3
+
+from PIL import Image
+
+
+def schema_meta(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute('SELECT key, value FROM schema_meta').fetchall())
+    finally:
+        conn.close()
+
+
+def test_fresh_database_reaches_latest_version(app_module):
+    latest = app_module.CONSENTS_MIGRATIONS[-1][0]
+    assert app_module.CONSENTS_SCHEMA['version'] == latest
+    assert schema_meta('consents.db')['schema_version'] == str(latest)
+    assert {'status', 'pdf_bytes', 'render_version', 'rendered_version'} <= app_module.CONSENTS_SCHEMA['columns']
+
+
+def test_migrations_are_idempotent(app_module):
+    version = app_module.CONSENTS_SCHEMA['version']
+    assert app_module.migrate_consents_database() == version
+
+
+def test_legacy_table_gets_created_at_default(app_module, tmp_path):
+    db_path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE consents (id INTEGER PRIMARY KEY AUTOINCREMENT, patient_name TEXT)')
+    conn.execute("INSERT INTO consents (patient_name) VALUES ('before upgrade')")
+    conn.commit()
+    conn.close()
+
+    app_module.migrate_consents_database(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO consents (patient_name) VALUES ('after upgrade')")
+    conn.commit()
+    created = conn.execute('SELECT created_at FROM consents ORDER BY id').fetchall()
+    conn.close()
+    assert all(created_at is not None for (created_at,) in created)
+
+
+def legacy_signature(shade):
+    image = Image.new('RGBA', (200, 60), (255, 255, 255, 0))
+    for x in range(20, 20 + shade):
+        image.putpixel((x, 30), (0, 0, 0, 255))
+    png = io.BytesIO()
+    image.save(png, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(png.getvalue()).decode()
+
+
+def test_inline_signatures_move_to_the_blob_store_in_batches(app_module, tmp_path, monkeypatch, capsys):
+    db_path = str(tmp_path / 'inline.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('''CREATE TABLE consents (id INTEGER PRIMARY KEY AUTOINCREMENT, patient_name TEXT,
+                    patient_signature_data TEXT, nurse_signature_data TEXT)''')
+    # Two patients share a signature, one row has no nurse signature yet
+    signatures = [legacy_signature(10), legacy_signature(10)] + [legacy_signature(20 + i) for i in range(5)]
+    conn.executemany('INSERT INTO consents (patient_name, patient_signature_data, nurse_signature_data) VALUES (?, ?, ?)',
+                     [(f'Patient {i}', signature, legacy_signature(90) if i else None) for i, signature in enumerate(signatures)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(app_module, 'SIGNATURE_MIGRATION_BATCH_SIZE', 3)
+    app_module.migrate_consents_database(db_path)
+    output = capsys.readouterr().out
+    assert 'Moved 3/7 patient signatures' in output
+    assert 'Moved 7/7 patient signatures' in output
+    assert 'Moved 6/6 nurse signatures' in output
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('''SELECT patient_signature_data, nurse_signature_data, patient_signature_hash, nurse_signature_hash
+                           FROM consents ORDER BY id''').fetchall()
+    blob_count = conn.execute('SELECT COUNT(*) FROM signature_blobs').fetchone()[0]
+    conn.close()
+    assert all(patient_data is None and nurse_data is None for patient_data, nurse_data, _, _ in rows)
+    assert rows[0][2] == rows[1][2]
+    assert rows[0][3] is None
+    assert all(patient_hash for _, _, patient_hash, _ in rows)
+    assert blob_count == 7
+
+
+def test_unapplied_migration_stays_pending_and_is_retried(app_module, tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'no_fts.db')
+    migrations = list(app_module.CONSENTS_MIGRATIONS)
+    fts_index = next(i for i, (version, _) in enumerate(migrations) if version == 6)
+
+    # SQLite without FTS5 - the step reports it could not apply
+    without_fts = list(migrations)
+    without_fts[fts_index] = (6, lambda conn: False)
+    monkeypatch.setattr(app_module, 'CONSENTS_MIGRATIONS', without_fts)
+    app_module.migrate_consents_database(db_path)
+    assert app_module.CONSENTS_SCHEMA['fts'] is False
+    assert app_module.CONSENTS_SCHEMA['pending'] == [6]
+    assert 'pdf_bytes' in app_module.CONSENTS_SCHEMA['columns']
+
+    monkeypatch.setattr(app_module, 'CONSENTS_MIGRATIONS', migrations)
+    app_module.migrate_consents_database(db_path)
+    assert app_module.CONSENTS_SCHEMA['fts'] is True
+    assert app_module.CONSENTS_SCHEMA['pending'] == []
+
+
+def test_first_request_migrates(app_module, client):
+    app_module.CONSENTS_SCHEMA['version'] = 0
+    client.get('/api/consents/search?q=test')
+    assert app_module.CONSENTS_SCHEMA['version'] == app_module.CONSENTS_MIGRATIONS[-1][0]
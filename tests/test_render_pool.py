@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture
+def render_pool(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'RENDER_WORKERS', 1)
+    yield
+    pool = app_module._render_pool
+    if pool is not None:
+        app_module.reset_render_pool(pool)
+
+
+def test_worker_start_does_not_inherit_held_locks(app_module, render_pool, insert_consent):
+    consent_id = insert_consent(final_pdf='consent_pool.pdf')
+    app_module.get_db('consents').execute('UPDATE consents SET render_version = 1 WHERE id = ?', (consent_id,)).connection.commit()
+
+    # A request thread is refreshing the template registry while the first job starts a worker
+    app_module._template_registry['checked_at'] = None
+    with app_module._template_lock:
+        future = app_module.queue_consent_render(consent_id)
+        assert future.result(timeout=60) == 'ready'
+
+    status, render_version, rendered_version = app_module.get_db('consents').execute(
+        'SELECT render_status, render_version, rendered_version FROM consents WHERE id = ?', (consent_id,)).fetchone()
+    assert status == 'ready'
+    assert rendered_version == render_version
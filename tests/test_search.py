@@ -0,0 +1,40 @@
+def test_prefix_matches_name_mrn_and_procedure(app_module, insert_consent):
+    appendix = insert_consent(patient_name='Fathima Rahman', patient_mrn='MRN4521', consent_required_for='Appendectomy')
+    knee = insert_consent(patient_name='Joseph Mathew', patient_mrn='MRN7730', consent_required_for='Knee replacement')
+
+    assert [r['id'] for r in app_module.search_consents('fath')] == [appendix]
+    assert [r['id'] for r in app_module.search_consents('mrn77')] == [knee]
+    assert [r['id'] for r in app_module.search_consents('appendec')] == [appendix]
+    assert [r['id'] for r in app_module.search_consents('joseph knee')] == [knee]
+    assert app_module.search_consents('joseph appendectomy') == []
+
+
+def test_query_syntax_is_not_interpreted(app_module, insert_consent):
+    insert_consent(patient_name='Anil Kumar')
+    assert len(app_module.search_consents('("anil" kumar*')) == 1
+    assert app_module.search_consents('anil OR ravi') == []
+    assert app_module.search_consents('***') == []
+
+
+def test_updates_reach_the_index(app_module, insert_consent):
+    consent_id = insert_consent(patient_name='Old Name')
+    conn = app_module.get_db('consents')
+    conn.execute("UPDATE consents SET patient_name = 'Priya Nair' WHERE id = ?", (consent_id,))
+    conn.commit()
+    assert app_module.search_consents('old') == []
+    assert [r['id'] for r in app_module.search_consents('priya')] == [consent_id]
+
+
+def test_limit_is_respected_and_clamped(app_module, client, insert_consent):
+    for index in range(120):
+        insert_consent(patient_name=f'Suresh {index}')
+
+    assert app_module.search_consents('suresh', limit=0) == []
+    assert len(app_module.search_consents('suresh', limit=3)) == 3
+    assert len(client.get('/api/consents/search?q=suresh&limit=500').get_json()['results']) == 100
+    assert len(client.get('/api/consents/search?q=suresh&limit=-5').get_json()['results']) == 1
+
+
+def test_search_requires_login(app_module):
+    response = app_module.app.test_client().get('/api/consents/search?q=test')
+    assert response.status_code == 401
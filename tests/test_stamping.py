@@ -0,0 +1,86 @@
+import base64
+import io
+import os
+
+from PIL import Image
+from PyPDF2 import PdfReader
+
+
+def signature_data():
+    image = Image.new('RGBA', (200, 60), (255, 255, 255, 0))
+    for x in range(20, 180):
+        image.putpixel((x, 30 + (x % 7)), (0, 0, 0, 255))
+    png = io.BytesIO()
+    image.save(png, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(png.getvalue()).decode()
+
+
+def pdf_text(app_module, consent_id):
+    conn = app_module.get_db('consents')
+    final_pdf = conn.execute('SELECT final_pdf FROM consents WHERE id = ?', (consent_id,)).fetchone()[0]
+    reader = PdfReader(os.path.join(app_module.app.config['GENERATED_FOLDER'], final_pdf))
+    return '\n'.join(page.extract_text() for page in reader.pages)
+
+
+def rendered_consent(app_module, insert_consent):
+    consent_id = insert_consent(final_pdf='consent_stamp_test.pdf', created_at='2026-03-01 08:30:00')
+    conn = app_module.get_db('consents')
+    assert app_module.regenerate_consent_pdf(conn, consent_id) == 'rendered'
+    return consent_id
+
+
+def test_nurse_signature_is_stamped_onto_the_rendered_pdf(app_module, insert_consent):
+    consent_id = rendered_consent(app_module, insert_consent)
+    before = pdf_text(app_module, consent_id)
+    assert 'Nurse Anitha' not in before
+
+    app_module.write_consents(app_module.record_staff_signature(consent_id, 'nurse', signature_data(), 'Nurse Anitha', '2026-03-01 09:15:00'))
+    conn = app_module.get_db('consents')
+    assert app_module.add_staff_signature_to_pdf(conn, consent_id, 'nurse') == 'stamped'
+
+    after = pdf_text(app_module, consent_id)
+    assert 'Nurse Anitha' in after
+    assert '2026-03-01 09:15:00' in after
+    # The nurse block loses its three placeholders, the doctor block keeps its two
+    assert before.count('Pending') == 5
+    assert after.count('Pending') == 2
+    render_version, rendered_version = conn.execute('SELECT render_version, rendered_version FROM consents WHERE id = ?', (consent_id,)).fetchone()
+    assert rendered_version == render_version
+
+
+def test_stamping_an_up_to_date_pdf_is_a_no_op(app_module, insert_consent):
+    consent_id = rendered_consent(app_module, insert_consent)
+    conn = app_module.get_db('consents')
+    assert app_module.add_staff_signature_to_pdf(conn, consent_id, 'nurse') == 'current'
+
+
+def test_missed_version_falls_back_to_a_full_render(app_module, insert_consent):
+    consent_id = rendered_consent(app_module, insert_consent)
+    app_module.write_consents(app_module.record_staff_signature(consent_id, 'nurse', signature_data(), 'Nurse Anitha', '2026-03-01 09:15:00'))
+    app_module.write_consents(app_module.record_staff_signature(consent_id, 'doctor', signature_data(), 'Dr. Sajid', '2026-03-01 10:00:00'))
+
+    conn = app_module.get_db('consents')
+    assert app_module.add_staff_signature_to_pdf(conn, consent_id, 'doctor') == 'rendered'
+    text = pdf_text(app_module, consent_id)
+    assert 'Nurse Anitha' in text
+    assert 'Pending' not in text
+
+
+def test_missing_consent(app_module, insert_consent):
+    conn = app_module.get_db('consents')
+    assert app_module.add_staff_signature_to_pdf(conn, 9999, 'nurse') == 'missing'
+    assert app_module.add_staff_signature_to_pdf(conn, insert_consent(), 'nurse') == 'missing'
+
+
+def test_signature_images_are_cached_by_their_stored_hash(app_module, insert_consent):
+    consent_id = rendered_consent(app_module, insert_consent)
+    app_module.write_consents(app_module.record_staff_signature(consent_id, 'nurse', signature_data(), 'Nurse Anitha', '2026-03-01 09:15:00'))
+    conn = app_module.get_db('consents')
+    signature_hash = conn.execute('SELECT nurse_signature_hash FROM consents WHERE id = ?', (consent_id,)).fetchone()[0]
+    assert app_module.add_staff_signature_to_pdf(conn, consent_id, 'nurse') == 'stamped'
+    assert signature_hash in app_module._signature_cache
+
+    # A hit is answered from the key alone - the PNG bytes are never read
+    hits = app_module.signature_cache_info()['hits']
+    assert app_module.get_signature_image((signature_hash, None)) is app_module._signature_cache[signature_hash]
+    assert app_module.signature_cache_info()['hits'] == hits + 1
@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def backend(app_module, monkeypatch):
+    """A registered counting backend that marks its output, selected in app.config"""
+    monkeypatch.setattr(app_module, 'TRANSLATION_BACKENDS', dict(app_module.TRANSLATION_BACKENDS))
+    calls = []
+
+    def register(name='counting', cacheable=True):
+        @app_module.register_translation_backend(name, cacheable=cacheable)
+        def counting_backend(texts, lang, timeout):
+            calls.append(list(texts))
+            return [f'ML:{text}' for text in texts]
+        monkeypatch.setitem(app_module.app.config, 'TRANSLATION_BACKEND', name)
+        return calls
+    return register
+
+
+def test_store_and_lookup_ignore_spacing_and_case(app_module):
+    app_module.store_translation('  Risks  of Surgery ', 'ശസ്ത്രക്രിയയുടെ അപകടസാധ്യതകൾ')
+    assert app_module.get_cached_translation('risks of   SURGERY') == 'ശസ്ത്രക്രിയയുടെ അപകടസാധ്യതകൾ'
+    assert app_module.get_cached_translation('Benefits') is None
+
+
+def test_lookups_fall_back_to_the_database(app_module):
+    app_module.store_translation('Bleeding', 'രക്തസ്രാവം')
+    app_module._translation_cache.clear()
+    assert app_module.get_cached_translations(['Bleeding', 'bleeding']) == {'Bleeding': 'രക്തസ്രാവം', 'bleeding': 'രക്തസ്രാവം'}
+    assert app_module.translation_cache_info()['db_hits'] == 1
+
+
+def test_legacy_json_is_imported_once(app_module):
+    with open(app_module.TRANSLATION_CACHE_JSON, 'w', encoding='utf-8') as f:
+        json.dump({'Infection': 'അണുബാധ', ' infection ': 'duplicate', 'Empty': ' '}, f)
+    # Keys that collapse onto one row keep the last entry in the file
+    assert app_module.get_cached_translation('INFECTION') == 'duplicate'
+    assert app_module.get_cached_translation('Empty') is None
+
+    conn = app_module.get_db('translations')
+    assert app_module.import_translation_json(conn) == 0
+    assert conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0] == 1
+
+
+def test_backend_sees_each_distinct_sentence_once(app_module, backend):
+    calls = backend()
+    text = 'Bleeding may occur. Infection is rare.\nbleeding   may occur.'
+    assert app_module.translate_text(text) == 'ML:Bleeding may occur. ML:Infection is rare.\nML:Bleeding may occur.'
+    assert sorted(sum(calls, [])) == ['Bleeding may occur.', 'Infection is rare.']
+
+    # A second pass is answered from the cache
+    assert app_module.translate_text('Infection is rare.') == 'ML:Infection is rare.'
+    assert len(calls) == 1
+
+
+def test_uncacheable_backend_output_is_not_stored(app_module, backend):
+    calls = backend('echo', cacheable=False)
+    app_module.translate_text('Bleeding may occur.')
+    app_module.translate_text('Bleeding may occur.')
+    assert len(calls) == 2
+    assert app_module.get_cached_translation('Bleeding may occur.') is None
+
+
+def test_failed_batch_stays_in_english(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'TRANSLATION_BACKENDS', dict(app_module.TRANSLATION_BACKENDS))
+
+    @app_module.register_translation_backend('broken')
+    def broken_backend(texts, lang, timeout):
+        raise ConnectionError('backend down')
+    monkeypatch.setitem(app_module.app.config, 'TRANSLATION_BACKEND', 'broken')
+
+    assert app_module.translate_text('Bleeding may occur.') == 'Bleeding may occur.'
+    assert app_module.get_cached_translation('Bleeding may occur.') is None
+
+
+def test_warmup_fills_the_cache_for_cacheable_backends(app_module, backend):
+    with open(os.path.join(app_module.app.config['UPLOAD_FOLDER'], 'knee.txt'), 'w', encoding='utf-8') as f:
+        f.write('Procedure: Knee replacement.\nRisks: Infection.')
+    backend()
+    report = app_module.warm_translation_cache()
+    assert report['before'] == 0.0
+    assert report['coverage'] == 1.0
+
+
+def test_warmup_skips_uncacheable_backends(app_module, backend):
+    with open(os.path.join(app_module.app.config['UPLOAD_FOLDER'], 'knee.txt'), 'w', encoding='utf-8') as f:
+        f.write('Procedure: Knee replacement.')
+    calls = backend('echo', cacheable=False)
+    report = app_module.warm_translation_cache()
+    assert calls == []
+    assert report['coverage'] == 0.0
+    assert app_module.start_translation_warmup() is None
+
+
+def test_first_request_starts_the_warmup_once(app_module, client, monkeypatch):
+    started = []
+    monkeypatch.setattr(app_module, 'start_translation_warmup', lambda: started.append(True))
+    client.get('/api/consents/search?q=test')
+    assert started == []
+
+    monkeypatch.setitem(app_module.app.config, 'TRANSLATION_WARMUP', True)
+    client.get('/api/consents/search?q=test')
+    client.get('/api/consents/search?q=test')
+    assert started == [True]
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def catalog(app_module):
+    """consent_system.db is owned by another tool - create the table it keeps"""
+    path = app_module.DATABASES['consent_system']
+
+    def write(rows):
+        conn = sqlite3.connect(path)
+        conn.execute('''CREATE TABLE IF NOT EXISTS consent_types
+                        (id INTEGER PRIMARY KEY, name TEXT, description TEXT, template_file TEXT)''')
+        conn.execute('DELETE FROM consent_types')
+        conn.executemany('INSERT INTO consent_types (name, description, template_file) VALUES (?, ?, ?)', rows)
+        conn.commit()
+        conn.close()
+        # Two quick edits can share an mtime on coarse filesystem clocks; the other tool's edits never do
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+        # Skip the recheck interval so the next lookup looks at the file
+        app_module._catalog_index['checked_at'] = None
+    write([
+        ('Knee Replacement', 'Total knee arthroplasty', 'knee.txt'),
+        ('Kidney Biopsy', 'Percutaneous renal biopsy', 'kidney.txt'),
+        ('Cataract Surgery', 'Lens replacement for the knee-deep backlog', 'cataract.txt'),
+        ('Blood Transfusion', 'Transfusion of blood products', 'blood.txt'),
+        ('Blood Transfusion', 'Duplicate row from an older import', 'blood_old.txt'),
+    ])
+    return write
+
+
+def names(results):
+    return [result['name'] for result in results]
+
+
+def test_every_word_matches_as_a_prefix(app_module, catalog):
+    assert names(app_module.search_consent_types('kn rep')) == ['Knee Replacement', 'Cataract Surgery']
+    assert names(app_module.search_consent_types('biop')) == ['Kidney Biopsy']
+    assert app_module.search_consent_types('knee biopsy') == []
+
+
+def test_name_matches_rank_before_description_matches(app_module, catalog):
+    assert names(app_module.search_consent_types('kn')) == ['Knee Replacement', 'Cataract Surgery']
+    assert names(app_module.search_consent_types('replacement')) == ['Knee Replacement', 'Cataract Surgery']
+
+
+def test_duplicate_names_are_shown_once(app_module, catalog):
+    assert names(app_module.search_consent_types('blood')) == ['Blood Transfusion']
+
+
+def test_limit(app_module, catalog):
+    assert names(app_module.search_consent_types('k', limit=1)) == ['Kidney Biopsy']
+    assert app_module.search_consent_types('k', limit=0) == []
+    assert app_module.search_consent_types('   ') == []
+
+
+def test_catalog_edits_rebuild_the_index(app_module, catalog):
+    assert names(app_module.search_consent_types('knee')) == ['Knee Replacement', 'Cataract Surgery']
+    types = app_module._catalog_index['types']
+
+    # An unchanged file is not re-read when the recheck interval passes
+    app_module._catalog_index['checked_at'] = None
+    app_module.search_consent_types('knee')
+    assert app_module._catalog_index['types'] is types
+
+    # An edit is only seen once the recheck interval has passed
+    signature = app_module._catalog_index['signature']
+    catalog([('Hernia Repair', 'Inguinal hernia mesh repair', 'hernia.txt')])
+    app_module._catalog_index['checked_at'] = app_module.time.monotonic()
+    assert names(app_module.search_consent_types('knee')) == ['Knee Replacement', 'Cataract Surgery']
+
+    app_module._catalog_index['checked_at'] = None
+    assert names(app_module.search_consent_types('her')) == ['Hernia Repair']
+    assert app_module.search_consent_types('knee') == []
+    assert app_module._catalog_index['signature'] != signature
+
+
+def test_route_clamps_limit(app_module, catalog, client):
+    catalog([(f'Form {index}', 'Generic consent', f'form{index}.txt') for index in range(60)])
+    assert len(client.get('/api/consent_types/search?q=form&limit=500').get_json()['results']) == 50
+    assert len(client.get('/api/consent_types/search?q=form&limit=0').get_json()['results']) == 1
+    assert app_module.app.test_client().get('/api/consent_types/search?q=form').status_code == 401
@@ -0,0 +1,27 @@
+import argparse
+
+from app import app, warm_translation_cache, translation_backend_cacheable, TRANSLATION_BACKENDS, TRANSLATION_LANGUAGE
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-translate every sentence of the consent template catalog")
+    parser.add_argument('--backend', choices=sorted(TRANSLATION_BACKENDS), default=app.config['TRANSLATION_BACKEND'],
+                        help="translation backend to fill the cache from")
+    parser.add_argument('--lang', default=TRANSLATION_LANGUAGE, help="target language code")
+    parser.add_argument('--dry-run', action='store_true', help="only report coverage, translate nothing")
+    args = parser.parse_args()
+    
+    app.config['TRANSLATION_BACKEND'] = args.backend
+    # Nothing a non-cached backend returns would be kept - report coverage and stop
+    skipped = not args.dry_run and not translation_backend_cacheable(args.backend)
+    if skipped:
+        print(f"ℹ️ The '{args.backend}' backend's output is not cached, so there is nothing to warm. "
+              f"Pick a cached backend with --backend (one of: {', '.join(name for name in sorted(TRANSLATION_BACKENDS) if translation_backend_cacheable(name))}).")
+    else:
+        print(f"🔄 Warming the {args.lang} translation cache with the '{args.backend}' backend...")
+    report = warm_translation_cache(args.lang, dry_run=args.dry_run or skipped)
+    
+    print(f"\n✅ Catalog sentences: {report['sentences']}")
+    print(f"✓ cached: {report['cached']} ({report['coverage']:.1%}, was {report['before']:.1%})")
+    print(f"✓ missing: {report['sentences'] - report['cached']}")
+    print(f"✓ took {report['seconds']:.1f}s")
+    raise SystemExit(0 if skipped or report['cached'] == report['sentences'] else 1)